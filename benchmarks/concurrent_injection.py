@@ -0,0 +1,60 @@
+"""
+Stress copy-on-write injection:  reader threads resolve continuously
+while the main thread hot-swaps injections.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/concurrent_injection.py
+"""
+
+from threading import Event, Thread
+from time import perf_counter
+
+from twin_sister.injection.dependency_context import DependencyContext
+
+READERS = 16
+SWAPS = 20000
+
+
+class HttpClient:
+    pass
+
+
+def main():
+    context = DependencyContext()
+    child = context.spawn()
+    for n in range(60):
+        context.inject(f"filler {n}", n)
+    context.inject_many({HttpClient: 0, "config": 0})
+    stop = Event()
+    reads = [0] * READERS
+    torn = []
+
+    def read(slot):
+        count = 0
+        while not stop.is_set():
+            frozen = child.freeze() if 0 == count % 100 else None
+            if frozen and frozen.get(HttpClient) != frozen.get("config"):
+                torn.append(slot)
+            child.get(HttpClient)
+            count += 1
+        reads[slot] = count
+
+    readers = [Thread(target=read, args=(slot,)) for slot in range(READERS)]
+    started = perf_counter()
+    for t in readers:
+        t.start()
+    for n in range(1, SWAPS + 1):
+        context.inject_many({HttpClient: n, "config": n})
+    swapping = perf_counter() - started
+    stop.set()
+    for t in readers:
+        t.join()
+    elapsed = perf_counter() - started
+    print(f"{SWAPS} batch swaps in {swapping:.2f} s ({swapping / SWAPS * 1e6:.1f} us each)")
+    print(f"{sum(reads)} resolutions by {READERS} readers in {elapsed:.2f} s")
+    print(f"inconsistent views: {len(torn)}")
+    print(f"final value seen by a reader: {child.get(HttpClient)} (expected {SWAPS})")
+
+
+if "__main__" == __name__:
+    main()
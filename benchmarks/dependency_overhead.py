@@ -0,0 +1,40 @@
+"""
+Compare the cost of dependency() to that of a plain attribute access
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/dependency_overhead.py
+"""
+
+from timeit import repeat
+
+from twin_sister import dependency, dependency_context
+
+
+class Holder:
+    thing = object()
+
+
+CALLS = 1000000
+
+
+def best_ns_per_call(stmt):
+    return min(repeat(stmt, number=CALLS, repeat=5, globals=globals())) / CALLS * 1e9
+
+
+def main():
+    thing = Holder.thing
+    globals()["thing"] = thing
+    attribute = best_ns_per_call("Holder.thing")
+    no_context = best_ns_per_call("dependency(thing)")
+    with dependency_context() as context:
+        context.inject(thing, object())
+        injected = best_ns_per_call("dependency(thing)")
+        missed = best_ns_per_call("dependency(Holder)")
+    print(f"attribute access:             {attribute:6.1f} ns")
+    print(f"dependency(), no context:     {no_context:6.1f} ns ({no_context / attribute:.1f}x attribute access)")
+    print(f"dependency(), injected:       {injected:6.1f} ns")
+    print(f"dependency(), not injected:   {missed:6.1f} ns")
+
+
+if "__main__" == __name__:
+    main()
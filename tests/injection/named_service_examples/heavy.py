@@ -0,0 +1,8 @@
+"""
+Stands in for a subsystem that is expensive to import
+"""
+
+
+class BillingClient:
+    class Nested:
+        pass
@@ -0,0 +1,143 @@
+import asyncio
+from unittest import TestCase, main
+
+from expects import expect, be, equal, raise_error
+
+from twin_sister import (
+    async_dependency_context,
+    close_all_dependency_contexts,
+    dependency,
+    dependency_context,
+    open_task_dependency_context,
+)
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+class TestAsyncDependencyContext(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def test_sees_injected_dependency(self):
+        real = "real spam"
+        fake = "fake spam"
+
+        async def canary():
+            async with async_dependency_context() as context:
+                context.inject(real, fake)
+                return dependency(real)
+
+        expect(asyncio.run(canary())).to(be(fake))
+
+    def test_stops_seeing_injection_when_context_ends(self):
+        real = "real spam"
+
+        async def canary():
+            async with async_dependency_context() as context:
+                context.inject(real, "fake spam")
+            return dependency(real)
+
+        expect(asyncio.run(canary())).to(be(real))
+
+    def test_concurrent_tasks_are_isolated(self):
+        real = "real spam"
+
+        async def canary(fake):
+            async with async_dependency_context() as context:
+                context.inject(real, fake)
+                await asyncio.sleep(0.01)
+                return dependency(real)
+
+        async def run_all():
+            return await asyncio.gather(*[canary(f"fake {n}") for n in range(10)])
+
+        expect(asyncio.run(run_all())).to(equal([f"fake {n}" for n in range(10)]))
+
+    def test_task_context_takes_precedence_over_thread_context(self):
+        real = "real spam"
+        task_fake = "task spam"
+
+        async def canary():
+            async with async_dependency_context() as context:
+                context.inject(real, task_fake)
+                return dependency(real)
+
+        with dependency_context() as context:
+            context.inject(real, "thread spam")
+            expect(asyncio.run(canary())).to(be(task_fake))
+
+    def test_thread_context_opened_inside_task_takes_precedence(self):
+        real = "real spam"
+        inner_fake = "inner spam"
+
+        async def canary():
+            async with async_dependency_context() as outer:
+                outer.inject(real, "outer spam")
+                with dependency_context() as inner:
+                    inner.inject(real, inner_fake)
+                    inside = dependency(real)
+                return inside, dependency(real)
+
+        expect(asyncio.run(canary())).to(equal((inner_fake, "outer spam")))
+
+    def test_child_task_inherits_context(self):
+        real = "real spam"
+        fake = "fake spam"
+
+        async def child():
+            return dependency(real)
+
+        async def parent():
+            async with async_dependency_context() as context:
+                context.inject(real, fake)
+                return await asyncio.create_task(child())
+
+        expect(asyncio.run(parent())).to(be(fake))
+
+    def test_child_task_does_not_leak_into_parent(self):
+        real = "real spam"
+
+        async def child():
+            context = open_task_dependency_context()
+            context.inject(real, "fake spam")
+
+        async def parent():
+            await asyncio.create_task(child())
+            return dependency(real)
+
+        expect(asyncio.run(parent())).to(be(real))
+
+    def test_unregisters_when_body_raises(self):
+        async def failing_handler():
+            async with async_dependency_context():
+                raise ValueError("spam")
+
+        for _ in range(3):
+            expect(lambda: asyncio.run(failing_handler())).to(raise_error(ValueError))
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_forgets_registration_when_task_ends_without_closing(self):
+        async def child():
+            open_task_dependency_context()
+
+        async def parent():
+            await asyncio.create_task(child())
+            await asyncio.sleep(0)  # let done callbacks run
+
+        asyncio.run(parent())
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_close_in_child_task_and_parent_counts_once(self):
+        async def child(context):
+            context.close()
+
+        async def parent():
+            context = open_task_dependency_context()
+            await asyncio.create_task(child(context))
+            context.close()
+            return DependencyRegistry.registration_count
+
+        expect(asyncio.run(parent())).to(equal(0))
+
+
+if "__main__" == __name__:
+    main()
@@ -1,9 +1,10 @@
 from threading import Thread
 from unittest import TestCase, main
 
-from expects import expect, be, raise_error
+from expects import expect, be, equal, raise_error
 
 from twin_sister import dependency, dependency_context
+from twin_sister.injection.dependency_registry import DependencyRegistry
 
 
 class TwoStageThread(Thread):
@@ -77,5 +78,67 @@ class TestAttachContextToThread(TestCase):
         expect(thing_seen_by_thread).to(be(real_thing))
 
 
+class TestAttachContextWhenThreadStarts(TestCase):
+    def test_sees_injected_dependency(self):
+        real_thing = "real thing"
+        injected_thing = "injected thing"
+        thing_seen_by_thread = None
+
+        def canary():
+            nonlocal thing_seen_by_thread
+            thing_seen_by_thread = dependency(real_thing)
+
+        with dependency_context() as context:
+            context.inject(real_thing, injected_thing)
+            t = Thread(target=canary)
+            context.attach_when_started(t)
+            t.start()
+            t.join()
+        expect(thing_seen_by_thread).to(be(injected_thing))
+
+    def test_works_with_thread_subclass(self):
+        real_thing = "real thing"
+        injected_thing = "injected thing"
+        seen = []
+
+        class Canary(Thread):
+            def run(self):
+                seen.append(dependency(real_thing))
+
+        with dependency_context() as context:
+            context.inject(real_thing, injected_thing)
+            t = Canary()
+            context.attach_when_started(t)
+            t.start()
+            t.join()
+        expect(seen).to(equal([injected_thing]))
+
+    def test_complains_if_thread_already_started(self):
+        t = Thread(target=print)
+        t.start()
+        t.join()
+        with dependency_context() as context:
+            expect(lambda: context.attach_when_started(t)).to(raise_error(RuntimeError))
+
+    def test_does_not_attach_if_context_closed_before_start(self):
+        real_thing = "real thing"
+        seen = []
+        with dependency_context() as context:
+            context.inject(real_thing, "injected thing")
+            t = Thread(target=lambda: seen.append(dependency(real_thing)))
+            context.attach_when_started(t)
+        t.start()
+        t.join()
+        expect(seen).to(equal([real_thing]))
+
+    def test_detaches_when_thread_finishes(self):
+        with dependency_context() as context:
+            t = Thread(target=print)
+            context.attach_when_started(t)
+            t.start()
+            t.join()
+            expect(DependencyRegistry.stats()["thread_stacks"]).to(equal(1))
+
+
 if "__main__" == __name__:
     main()
@@ -0,0 +1,80 @@
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expects import expect, be_false, be_true, equal
+
+import twin_sister.injection.fake_fs as fake_fs
+
+
+def build_source():
+    fs = fake_fs.create_fs()
+    fs.create_file("/etc/app/app.ini", contents="[app]")
+    fs.create_file("/opt/run", contents="#!/bin/sh", st_mode=0o100750)
+    fs.create_dir("/var/empty")
+    fs.create_symlink("/etc/current.ini", "app/app.ini")
+    return fs
+
+
+class CloneContract:
+    """
+    What any way of cloning a fake filesystem must do
+    """
+
+    def clone(self, source):
+        raise NotImplementedError()
+
+    def test_copies_files(self):
+        clone = self.clone(build_source())
+        expect(clone.get_object("/etc/app/app.ini").contents).to(equal("[app]"))
+
+    def test_copies_modes(self):
+        clone = self.clone(build_source())
+        expect(fake_fs.create_os(clone).stat("/opt/run").st_mode & 0o777).to(equal(0o750))
+
+    def test_copies_empty_directories(self):
+        clone = self.clone(build_source())
+        expect(fake_fs.create_os(clone).path.isdir("/var/empty")).to(be_true)
+
+    def test_copies_symlinks(self):
+        clone = self.clone(build_source())
+        expect(fake_fs.create_os(clone).readlink("/etc/current.ini")).to(equal("app/app.ini"))
+
+    def test_changes_to_clone_do_not_reach_source(self):
+        source = build_source()
+        clone = self.clone(source)
+        clone_os = fake_fs.create_os(clone)
+        clone_os.remove("/etc/app/app.ini")
+        with fake_fs.create_open(clone)("/opt/run", "a") as f:
+            f.write("\nexit 0")
+        clone.create_file("/new")
+        expect(source.exists("/etc/app/app.ini")).to(be_true)
+        expect(source.get_object("/opt/run").contents).to(equal("#!/bin/sh"))
+        expect(source.exists("/new")).to(be_false)
+
+
+class TestCloneFs(CloneContract, TestCase):
+    def clone(self, source):
+        return fake_fs.clone_fs(source)
+
+
+class TestReplayFs(CloneContract, TestCase):
+    def clone(self, source):
+        return fake_fs.replay_fs(source)
+
+
+class TestCloneFsFallback(TestCase):
+    def test_replays_when_tree_cannot_be_copied(self):
+        source = build_source()
+        with patch.object(fake_fs, "_can_copy_tree", return_value=False):
+            with patch.object(fake_fs, "replay_fs", wraps=fake_fs.replay_fs) as replay:
+                fake_fs.clone_fs(source)
+        expect(replay.call_count).to(equal(1))
+
+    def test_replays_when_filesystem_is_not_held_weakly(self):
+        source = build_source()
+        source.root._filesystem = source  # as in older pyfakefs releases
+        expect(fake_fs._can_copy_tree(source)).to(be_false)
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,61 @@
+from threading import Event, Thread
+from unittest import TestCase, main
+
+from expects import expect, be_empty, equal
+
+from twin_sister.injection.dependency_context import DependencyContext
+
+
+class TestConcurrentInjection(TestCase):
+    def test_concurrent_injections_are_not_lost(self):
+        context = DependencyContext()
+
+        def inject_range(start):
+            for n in range(start, start + 200):
+                context.inject(n, str(n))
+
+        threads = [Thread(target=inject_range, args=(start,)) for start in range(0, 1600, 200)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        expect([n for n in range(1600) if context.get(n) != str(n)]).to(be_empty)
+
+    def test_reader_sees_whole_batch_or_none_of_it(self):
+        context = DependencyContext()
+        context.inject_many({"a": 0, "b": 0})
+        stop = Event()
+        torn = []
+
+        def read():
+            while not stop.is_set():
+                # freeze reads the published injections once
+                frozen = context.freeze()
+                a, b = frozen.get("a"), frozen.get("b")
+                if a != b:
+                    torn.append((a, b))
+
+        readers = [Thread(target=read) for _ in range(4)]
+        for t in readers:
+            t.start()
+        for n in range(1, 500):
+            context.inject_many({"a": n, "b": n})
+        stop.set()
+        for t in readers:
+            t.join()
+        expect(torn).to(be_empty)
+
+    def test_reader_sees_latest_injection_after_writer_returns(self):
+        context = DependencyContext()
+        child = context.spawn()
+        seen = []
+        for n in range(100):
+            context.inject("spam", n)
+            t = Thread(target=lambda: seen.append(child.get("spam")))
+            t.start()
+            t.join()
+        expect(seen).to(equal(list(range(100))))
+
+
+if "__main__" == __name__:
+    main()
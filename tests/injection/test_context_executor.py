@@ -0,0 +1,72 @@
+from threading import get_ident
+from unittest import TestCase, main
+
+from expects import expect, be, equal
+
+from twin_sister import ContextThreadPoolExecutor, close_all_dependency_contexts, dependency, dependency_context
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+class TestContextThreadPoolExecutor(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def test_task_sees_injected_dependency(self):
+        real = "real spam"
+        fake = "fake spam"
+        with ContextThreadPoolExecutor(max_workers=1) as pool:
+            with dependency_context() as context:
+                context.inject(real, fake)
+                expect(pool.submit(dependency, real).result()).to(be(fake))
+
+    def test_passes_keyword_arguments_named_context_and_fn(self):
+        def render(template, *, context, fn):
+            return template, context, fn
+
+        with ContextThreadPoolExecutor(max_workers=1) as pool:
+            with dependency_context():
+                future = pool.submit(render, "t", context={"a": 1}, fn="spam")
+                expect(future.result()).to(equal(("t", {"a": 1}, "spam")))
+
+    def test_task_runs_in_worker_thread(self):
+        with ContextThreadPoolExecutor(max_workers=1) as pool:
+            with dependency_context():
+                expect(pool.submit(get_ident).result()).not_to(equal(get_ident()))
+
+    def test_map_sees_injected_dependency(self):
+        real = "real spam"
+        fake = "fake spam"
+        with ContextThreadPoolExecutor(max_workers=4) as pool:
+            with dependency_context() as context:
+                context.inject(real, fake)
+                seen = list(pool.map(lambda _: dependency(real), range(20)))
+        expect(seen).to(equal([fake] * 20))
+
+    def test_each_task_sees_context_current_at_submission(self):
+        real = "real spam"
+        with ContextThreadPoolExecutor(max_workers=1) as pool:
+            with dependency_context() as first:
+                first.inject(real, "first")
+                first_future = pool.submit(dependency, real)
+                with dependency_context() as second:
+                    second.inject(real, "second")
+                    second_future = pool.submit(dependency, real)
+                    expect((first_future.result(), second_future.result())).to(equal(("first", "second")))
+
+    def test_worker_forgets_context_after_task(self):
+        real = "real spam"
+        with ContextThreadPoolExecutor(max_workers=1) as pool:
+            with dependency_context() as context:
+                context.inject(real, "fake spam")
+                pool.submit(dependency, real).result()
+            expect(pool.submit(dependency, real).result()).to(be(real))
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_task_without_context_sees_real_dependency(self):
+        real = "real spam"
+        with ContextThreadPoolExecutor(max_workers=1) as pool:
+            expect(pool.submit(dependency, real).result()).to(be(real))
+
+
+if "__main__" == __name__:
+    main()
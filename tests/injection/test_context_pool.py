@@ -0,0 +1,137 @@
+import logging
+import os
+from unittest import TestCase, main
+
+from expects import expect, be, be_empty, be_false, equal
+
+from twin_sister import close_all_dependency_contexts, dependency, dependency_context, open_dependency_context
+from twin_sister.injection.context_pool import ContextPool
+from twin_sister.injection.dependency_context import DependencyContext
+
+
+class Thing:
+    pass
+
+
+class TestReset(TestCase):
+    def test_removes_injections(self):
+        context = DependencyContext()
+        context.inject(Thing, object())
+        context.inject(["unhashable"], object())
+        context.reset()
+        expect(context.get(Thing)).to(be(Thing))
+
+    def test_keeps_supplied_fakes(self):
+        context = DependencyContext(supply_fs=True, supply_logging=True)
+        context.inject(os, object())
+        context.reset()
+        expect((context.get(os), context.get(logging))).to(equal((context.os, context.logging)))
+
+    def test_empties_fake_filesystem(self):
+        context = DependencyContext(supply_fs=True)
+        context.create_file("/spam/eggs", text="sausage")
+        context.reset()
+        expect(context.get(os).path.exists("/spam")).to(be_false)
+
+    def test_fake_filesystem_is_usable_after_reset(self):
+        context = DependencyContext(supply_fs=True)
+        context.reset()
+        context.create_file("/spam/eggs", text="sausage")
+        with context.get(open)("/spam/eggs") as f:
+            expect(f.read()).to(equal("sausage"))
+
+    def test_discards_log_records(self):
+        context = DependencyContext(supply_logging=True)
+        context.get(logging).getLogger("spam").error("eggs")
+        context.reset()
+        expect(context.logging.stored_records).to(be_empty)
+
+    def test_clears_fake_environment(self):
+        context = DependencyContext(supply_env=True)
+        context.set_env(SPAM="eggs")
+        context.reset()
+        expect(context.os.environ).to(equal({}))
+
+    def test_invalidates_cached_resolution_in_child(self):
+        parent = DependencyContext()
+        parent.inject(Thing, object())
+        child = parent.spawn()
+        child.get(Thing)
+        parent.reset()
+        expect(child.get(Thing)).to(be(Thing))
+
+    def test_does_not_reset_logging_inherited_from_parent(self):
+        parent = DependencyContext(supply_logging=True)
+        parent.logging.getLogger("spam").error("eggs")
+        parent.spawn().reset()
+        expect(len(parent.logging.stored_records)).to(equal(1))
+
+
+class TestContextPool(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def test_recycles_closed_context(self):
+        pool = ContextPool()
+        context = pool.acquire(supply_fs=True)
+        context.close()
+        expect(pool.acquire(supply_fs=True)).to(be(context))
+
+    def test_recycled_context_keeps_its_fake_filesystem(self):
+        pool = ContextPool()
+        context = pool.acquire(supply_fs=True)
+        fs, fake_open = context.fs, context.get(open)
+        context.create_file("/spam")
+        context.close()
+        recycled = pool.acquire(supply_fs=True)
+        expect(recycled.fs).to(be(fs))
+        expect(recycled.get(open)).to(be(fake_open))
+        expect(recycled.os.path.exists("/spam")).to(be_false)
+
+    def test_does_not_mix_contexts_with_different_fakes(self):
+        pool = ContextPool()
+        context = pool.acquire(supply_fs=True)
+        context.close()
+        expect(pool.acquire(supply_logging=True)).not_to(be(context))
+
+    def test_recycled_context_is_reset(self):
+        pool = ContextPool()
+        context = pool.acquire()
+        context.inject(Thing, object())
+        context.close()
+        expect(pool.acquire().get(Thing)).to(be(Thing))
+
+    def test_closing_twice_releases_once(self):
+        pool = ContextPool()
+        context = pool.acquire()
+        context.close()
+        context.close()
+        expect(pool.idle_count()).to(equal(1))
+
+    def test_does_not_recycle_context_with_parent(self):
+        pool = ContextPool()
+        context = pool.acquire(parent=DependencyContext())
+        context.close()
+        expect(pool.idle_count()).to(equal(0))
+
+    def test_open_dependency_context_can_recycle(self):
+        first = open_dependency_context(recycle=True, supply_env=True)
+        first.close()
+        second = open_dependency_context(recycle=True, supply_env=True)
+        try:
+            expect(second).to(be(first))
+        finally:
+            second.close()
+
+    def test_recycled_context_is_registered(self):
+        injected = object()
+        with dependency_context(recycle=True) as context:
+            pass
+        with dependency_context(recycle=True) as context:
+            context.inject(Thing, injected)
+            expect(dependency(Thing)).to(be(injected))
+        expect(dependency(Thing)).to(be(Thing))
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,118 @@
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import os
+import pickle
+from unittest import TestCase, main
+
+from expects import expect, be, be_a, equal
+
+from twin_sister import close_all_dependency_contexts, dependency, install_snapshot
+from twin_sister.injection.dependency_context import DependencyContext
+from twin_sister.injection.dependency_registry import DependencyRegistry
+from twin_sister.injection.fake_logging import FakeLogging
+
+
+class Thing:
+    pass
+
+
+def fake_loads(text):
+    return "fake loads"
+
+
+def resolve_in_worker(dep):
+    return dependency(dep)
+
+
+def name_json_in_worker():
+    return dependency(json).__name__
+
+
+def read_env_in_worker(key):
+    return dependency(os).environ.get(key)
+
+
+def round_trip(context):
+    return pickle.loads(pickle.dumps(context.snapshot())).restore()
+
+
+class TestContextSnapshot(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def test_restores_injection_keyed_by_class(self):
+        context = DependencyContext()
+        context.inject(Thing, "fake thing")
+        expect(round_trip(context).get(Thing)).to(equal("fake thing"))
+
+    def test_restores_injection_keyed_by_module(self):
+        context = DependencyContext()
+        context.inject(json, Thing)
+        expect(round_trip(context).get(json)).to(be(Thing))
+
+    def test_restores_injection_keyed_by_function(self):
+        context = DependencyContext()
+        context.inject(json.loads, fake_loads)
+        expect(round_trip(context).get(json.loads)).to(be(fake_loads))
+
+    def test_flattens_ancestors(self):
+        parent = DependencyContext()
+        parent.inject(Thing, "parent thing")
+        parent.inject(json, "parent json")
+        child = parent.spawn()
+        child.inject(json, "child json")
+        restored = round_trip(child)
+        expect((restored.get(Thing), restored.get(json))).to(equal(("parent thing", "child json")))
+
+    def test_restores_environment(self):
+        context = DependencyContext(supply_env=True)
+        context.set_env(SPAM="eggs")
+        expect(round_trip(context).os.environ).to(equal({"SPAM": "eggs"}))
+
+    def test_does_not_fake_environment_unless_original_did(self):
+        expect(round_trip(DependencyContext()).os.environ).to(be(os.environ))
+
+    def test_supplies_fresh_logging(self):
+        context = DependencyContext(supply_logging=True)
+        expect(round_trip(context).get(logging)).to(be_a(FakeLogging))
+
+    def test_supplies_fresh_filesystem(self):
+        context = DependencyContext(supply_fs=True)
+        restored = round_trip(context)
+        expect(restored.get(os)).to(be(restored.os))
+
+    def test_install_replaces_registered_contexts(self):
+        DependencyRegistry.register(DependencyContext())
+        context = install_snapshot(DependencyContext().snapshot())
+        expect(DependencyRegistry.current_context()).to(be(context))
+        expect(DependencyRegistry.registration_count).to(equal(1))
+        close_all_dependency_contexts()
+
+
+class TestProcessPoolWithSnapshot(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def run_in_worker(self, context, fn, *args):
+        with ProcessPoolExecutor(max_workers=1, initializer=install_snapshot, initargs=(context.snapshot(),)) as pool:
+            return pool.submit(fn, *args).result()
+
+    def test_worker_sees_injected_dependency(self):
+        context = DependencyContext()
+        context.inject(Thing, "fake thing")
+        expect(self.run_in_worker(context, resolve_in_worker, Thing)).to(equal("fake thing"))
+
+    def test_worker_sees_injected_module(self):
+        context = DependencyContext()
+        context.inject(json, pickle)
+        expect(self.run_in_worker(context, name_json_in_worker)).to(equal("pickle"))
+
+    def test_worker_sees_fake_environment(self):
+        context = DependencyContext(supply_env=True)
+        context.set_env(SPAM="eggs")
+        expect(self.run_in_worker(context, read_env_in_worker, "SPAM")).to(equal("eggs"))
+
+
+if "__main__" == __name__:
+    main()
@@ -26,6 +26,20 @@ class TestDependencyContext(TestCase):
         sut.inject(dependency, injected)
         expect(sut.get(dependency)).to(be(injected))
 
+    def test_get_returns_latest_injection(self):
+        dependency = object()
+        injected = object()
+        sut = DependencyContext()
+        sut.inject(dependency, object())
+        sut.inject(dependency, injected)
+        expect(sut.get(dependency)).to(be(injected))
+
+    def test_get_matches_equal_dependency(self):
+        injected = object()
+        sut = DependencyContext()
+        sut.inject("spam", injected)
+        expect(sut.get("".join(("sp", "am")))).to(be(injected))
+
     def test_spawned_context_returns_value_from_parent(self):
         key = object()
         parent_value = 46
@@ -54,6 +68,31 @@ class TestDependencyContext(TestCase):
         child.inject(key, child_value)
         expect(parent.get(key)).to(be(parent_value))
 
+    def test_deep_context_sees_injection_into_ancestor_after_first_hit(self):
+        key = object()
+        new_value = object()
+        grandparent = DependencyContext()
+        grandparent.inject(key, object())
+        child = grandparent.spawn().spawn().spawn()
+        child.get(key)
+        grandparent.inject(key, new_value)
+        expect(child.get(key)).to(be(new_value))
+
+    def test_deep_context_sees_new_injection_after_miss(self):
+        key = object()
+        injected = object()
+        grandparent = DependencyContext()
+        child = grandparent.spawn().spawn()
+        child.get(key)
+        grandparent.inject(key, injected)
+        expect(child.get(key)).to(be(injected))
+
+    def test_miss_returns_requested_object_rather_than_equal_one(self):
+        sut = DependencyContext()
+        sut.get(1)
+        requested = 1.0
+        expect(sut.get(requested)).to(be(requested))
+
 
 if "__main__" == __name__:
     main()
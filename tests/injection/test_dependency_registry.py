@@ -0,0 +1,108 @@
+import asyncio
+from threading import Event, Thread
+from unittest import TestCase, main
+
+from expects import expect, be, equal
+
+from twin_sister import (
+    async_dependency_context,
+    close_all_dependency_contexts,
+    dependency,
+    dependency_context,
+    open_dependency_context,
+)
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+class TestDependencyRegistry(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def test_nothing_registered_after_reset(self):
+        open_dependency_context()
+        close_all_dependency_contexts()
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_counts_open_context(self):
+        with dependency_context():
+            expect(DependencyRegistry.registration_count).to(equal(1))
+
+    def test_counts_closed_context(self):
+        with dependency_context():
+            pass
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_counts_attached_thread(self):
+        t = Thread(target=print)
+        t.start()
+        t.join()
+        with dependency_context() as context:
+            context.attach_to_thread(t)
+            expect(DependencyRegistry.registration_count).to(equal(2))
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_counts_task_context(self):
+        async def canary():
+            async with async_dependency_context():
+                return DependencyRegistry.registration_count
+
+        expect(asyncio.run(canary())).to(equal(1))
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_closing_twice_does_not_confuse_count(self):
+        outer = open_dependency_context()
+        try:
+            inner = open_dependency_context()
+            inner.close()
+            inner.close()
+            expect(DependencyRegistry.registration_count).to(equal(1))
+        finally:
+            outer.close()
+
+    def test_stats_reports_open_contexts(self):
+        with dependency_context():
+            with dependency_context():
+                expect(DependencyRegistry.stats()).to(equal({"thread_stacks": 1, "contexts": 2, "registrations": 2}))
+
+    def test_stats_counts_context_attached_to_two_threads_once(self):
+        finish = Event()
+        threads = [Thread(target=finish.wait, daemon=True) for _ in range(2)]
+        for t in threads:
+            t.start()
+        try:
+            with dependency_context() as context:
+                for t in threads:
+                    context.attach_to_thread(t)
+                expect(DependencyRegistry.stats()).to(equal({"thread_stacks": 3, "contexts": 1, "registrations": 3}))
+        finally:
+            finish.set()
+
+    def test_closed_context_leaves_no_stack_behind(self):
+        with dependency_context():
+            pass
+        expect(DependencyRegistry.stats()["thread_stacks"]).to(equal(0))
+
+    def test_forgets_stack_of_dead_thread(self):
+        def leak():
+            open_dependency_context()
+
+        t = Thread(target=leak)
+        t.start()
+        t.join()
+        expect(DependencyRegistry.stats()).to(equal({"thread_stacks": 0, "contexts": 0, "registrations": 0}))
+
+    def test_dead_thread_does_not_prevent_fast_path(self):
+        t = Thread(target=open_dependency_context)
+        t.start()
+        t.join()
+        with dependency_context():
+            pass
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+    def test_dependency_returns_original_when_nothing_registered(self):
+        thing = object()
+        expect(dependency(thing)).to(be(thing))
+
+
+if "__main__" == __name__:
+    main()
@@ -1,11 +1,21 @@
 import os
+import subprocess
+import sys
 from unittest import TestCase, main
 
 from expects import expect, be, be_a, equal
 from pyfakefs import fake_filesystem as fakefs
 
 from twin_sister import dependency, dependency_context
+from twin_sister.fakes import FunctionSpy
 from twin_sister.injection.dependency_context import DependencyContext
+from twin_sister.injection.fake_fs import write_files
+from twin_sister.injection.passthrough import Passthrough
+
+
+def read(filename, mode="r"):
+    with dependency(open)(filename, mode) as f:
+        return f.read()
 
 
 class TestFakeFilesystem(TestCase):
@@ -112,6 +122,95 @@ class TestFakeFilesystem(TestCase):
                 caught = e
             expect(caught).not_to(equal(None))
 
+    def test_create_files_accepts_mapping(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/a/b/c.txt": b"binary", "/a/d.txt": "text", "/a/e/empty": None})
+            expect(read("/a/b/c.txt", "rb")).to(equal(b"binary"))
+            expect(read("/a/d.txt")).to(equal("text"))
+            expect(read("/a/e/empty")).to(equal(""))
+
+    def test_create_files_accepts_pairs(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_files((f"/spam/{n}", str(n)) for n in range(3))
+            expect(sorted(context.os.listdir("/spam"))).to(equal(["0", "1", "2"]))
+
+    def test_create_files_streams_chunks(self):
+        consumed = []
+
+        def chunks():
+            for chunk in (b"spam", "eggs", b"sausage"):
+                consumed.append(chunk)
+                yield chunk
+
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/menu": chunks()})
+            expect(read("/menu", "rb")).to(equal(b"spameggssausage"))
+        expect(len(consumed)).to(equal(3))
+
+    def test_create_files_makes_each_directory_once(self):
+        made = []
+
+        class SpyOs(Passthrough):
+            def makedirs(self, path, **kwargs):
+                made.append(path)
+                return self._target.makedirs(path, **kwargs)
+
+        with dependency_context(supply_fs=True) as context:
+            _, fake_os, fake_open = context._filesystem.build()
+            files = [("/a/b/1", ""), ("/a/b/2", ""), ("/a/3", ""), ("/c/4", "")]
+            write_files(SpyOs(fake_os), fake_open, files)
+        expect(made).to(equal(["/a/b", "/c"]))
+
+    def test_create_file_ignores_open_injected_by_test(self):
+        with dependency_context(supply_fs=True) as context:
+            context.inject(open, FunctionSpy())
+            context.create_file("/etc/app.conf", text="x")
+            expect(context.os.path.exists("/etc/app.conf")).to(equal(True))
+
+    def test_create_files_are_not_counted_as_io(self):
+        with dependency_context(supply_fs=True) as context:
+            context.enable_fs_stats()
+            context.create_files({"/spam": "eggs"})
+            expect(context.fs_stats()["paths"]).to(equal({}))
+
+    def test_create_files_replaces_existing_content(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam", text="a long line of text")
+            context.create_files({"/spam": "short"})
+            expect(read("/spam")).to(equal("short"))
+
+    def test_does_not_build_filesystem_until_used(self):
+        with dependency_context(supply_fs=True) as context:
+            expect(context._filesystem.is_built).to(equal(False))
+
+    def test_does_not_build_filesystem_for_fake_environ(self):
+        with dependency_context(supply_fs=True, supply_env=True) as context:
+            context.set_env(SPAM="eggs")
+            expect(dependency(os).environ).to(equal({"SPAM": "eggs"}))
+            expect(context._filesystem.is_built).to(equal(False))
+
+    def test_builds_filesystem_when_open_first_used(self):
+        with dependency_context(supply_fs=True) as context:
+            try:
+                dependency(open)("nothing-here")
+            except FileNotFoundError:
+                pass
+            expect(context._filesystem.is_built).to(equal(True))
+
+    def test_does_not_import_pyfakefs_until_filesystem_used(self):
+        script = (
+            "import sys\n"
+            "from twin_sister import dependency_context\n"
+            "with dependency_context(supply_fs=True, supply_env=True) as context:\n"
+            "    context.set_env(SPAM='eggs')\n"
+            "    print('pyfakefs' in sys.modules)\n"
+            "    context.create_file('spam')\n"
+            "    print('pyfakefs' in sys.modules)\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.check_output([sys.executable, "-c", script], cwd=root, text=True)
+        expect(out.split()).to(equal(["False", "True"]))
+
     def test_complains_about_attempt_to_mix_with_parent_context(self):
         try:
             DependencyContext(parent=DependencyContext(), supply_fs=True)
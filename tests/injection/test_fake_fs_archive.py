@@ -0,0 +1,208 @@
+import io
+import os
+import tarfile
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from expects import expect, be_true, contain, equal, raise_error
+
+from twin_sister import dependency, dependency_context
+from twin_sister.fakes import FunctionSpy
+
+
+def read(filename, mode="r"):
+    with dependency(open)(filename, mode) as f:
+        return f.read()
+
+
+class TestExportFs(TestCase):
+    def export(self, context, **kwargs):
+        buffer = io.BytesIO()
+        context.export_fs(buffer, **kwargs)
+        buffer.seek(0)
+        return tarfile.open(fileobj=buffer)
+
+    def test_exports_files(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/out/report.txt": "done", "/out/data/rows.csv": b"1,2"})
+            archive = self.export(context)
+            expect(archive.extractfile("out/report.txt").read()).to(equal(b"done"))
+            expect(archive.extractfile("out/data/rows.csv").read()).to(equal(b"1,2"))
+
+    def test_exports_directories(self):
+        with dependency_context(supply_fs=True) as context:
+            context.os.makedirs("/out/empty")
+            expect(self.export(context).getmember("out/empty").isdir()).to(be_true)
+
+    def test_exports_symlinks(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/out/real", text="real")
+            context.os.symlink("real", "/out/link")
+            expect(self.export(context).getmember("out/link").linkname).to(equal("real"))
+
+    def test_exports_file_mode(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/run.sh")
+            context.os.chmod("/run.sh", 0o750)
+            expect(self.export(context).getmember("run.sh").mode).to(equal(0o750))
+
+    def test_exports_only_root(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/out/report.txt": "done", "/elsewhere": "x"})
+            expect(self.export(context, root="/out").getnames()).to(equal(["report.txt"]))
+
+    def test_compresses(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam", text="eggs")
+            buffer = io.BytesIO()
+            context.export_fs(buffer, compression="gz")
+            expect(buffer.getvalue()[:2]).to(equal(b"\x1f\x8b"))
+
+    def test_writes_real_file(self):
+        with TemporaryDirectory() as path:
+            filename = os.path.join(path, "fs.tar")
+            with dependency_context(supply_fs=True) as context:
+                context.create_file("/spam", text="eggs")
+                context.export_fs(filename)
+            with tarfile.open(filename) as archive:
+                expect(archive.getnames()).to(contain("spam"))
+
+    def test_ignores_open_injected_by_test(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam", text="eggs")
+            context.inject(open, FunctionSpy())
+            expect(self.export(context).extractfile("spam").read()).to(equal(b"eggs"))
+
+    def test_is_not_counted_as_io(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam", text="eggs")
+            context.enable_fs_stats()
+            self.export(context)
+            expect(context.fs_stats()["paths"]).to(equal({}))
+
+
+class TestImportFs(TestCase):
+    def test_imports_directory(self):
+        with TemporaryDirectory() as path:
+            os.makedirs(os.path.join(path, "sub", "empty"))
+            with open(os.path.join(path, "sub", "a.txt"), "w") as f:
+                f.write("a")
+            with dependency_context(supply_fs=True) as context:
+                context.import_fs(path, target="/imported")
+                expect(read("/imported/sub/a.txt")).to(equal("a"))
+                expect(context.os.path.isdir("/imported/sub/empty")).to(be_true)
+
+    def test_imports_directory_to_same_path_by_default(self):
+        with TemporaryDirectory() as path:
+            with open(os.path.join(path, "a.txt"), "w") as f:
+                f.write("a")
+            with dependency_context(supply_fs=True) as context:
+                context.import_fs(path)
+                expect(read(os.path.join(path, "a.txt"))).to(equal("a"))
+
+    def test_imports_directory_symlink(self):
+        with TemporaryDirectory() as path:
+            with open(os.path.join(path, "a.txt"), "w") as f:
+                f.write("a")
+            os.symlink("a.txt", os.path.join(path, "link"))
+            with dependency_context(supply_fs=True) as context:
+                context.import_fs(path, target="/imported")
+                expect(context.os.readlink("/imported/link")).to(equal("a.txt"))
+
+    def test_imports_file_mode(self):
+        with TemporaryDirectory() as path:
+            filename = os.path.join(path, "run.sh")
+            with open(filename, "w"):
+                pass
+            os.chmod(filename, 0o750)
+            with dependency_context(supply_fs=True) as context:
+                context.import_fs(path, target="/imported")
+                expect(context.os.stat("/imported/run.sh").st_mode & 0o777).to(equal(0o750))
+
+    def test_round_trip_through_archive(self):
+        buffer = io.BytesIO()
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/out/report.txt": "done", "/out/data/rows.csv": b"1,2"})
+            context.os.makedirs("/out/empty")
+            context.os.symlink("report.txt", "/out/latest")
+            context.export_fs(buffer, compression="bz2")
+        buffer.seek(0)
+        with dependency_context(supply_fs=True) as context:
+            context.import_fs(buffer, target="/restored")
+            expect(read("/restored/out/report.txt")).to(equal("done"))
+            expect(read("/restored/out/data/rows.csv", "rb")).to(equal(b"1,2"))
+            expect(read("/restored/out/latest")).to(equal("done"))
+            expect(context.os.path.isdir("/restored/out/empty")).to(be_true)
+
+    def test_imports_archive_from_path(self):
+        with TemporaryDirectory() as path:
+            filename = os.path.join(path, "fs.tar.gz")
+            with dependency_context(supply_fs=True) as context:
+                context.create_file("/spam", text="eggs")
+                context.export_fs(filename, compression="gz")
+            with dependency_context(supply_fs=True) as context:
+                context.import_fs(filename)
+                expect(read("/spam")).to(equal("eggs"))
+
+    def test_ignores_open_injected_by_test(self):
+        with TemporaryDirectory() as path:
+            with open(os.path.join(path, "a.txt"), "w") as f:
+                f.write("a")
+            with dependency_context(supply_fs=True) as context:
+                context.inject(open, FunctionSpy())
+                context.import_fs(path, target="/imported")
+                expect(context.os.path.exists("/imported/a.txt")).to(be_true)
+
+    def test_is_not_counted_as_io(self):
+        with TemporaryDirectory() as path:
+            with open(os.path.join(path, "a.txt"), "w") as f:
+                f.write("a")
+            with dependency_context(supply_fs=True) as context:
+                context.enable_fs_stats()
+                context.import_fs(path, target="/imported")
+                expect(context.fs_stats()["paths"]).to(equal({}))
+
+    def test_imports_hard_links(self):
+        with TemporaryDirectory() as path:
+            source = os.path.join(path, "source")
+            os.makedirs(source)
+            with open(os.path.join(source, "b"), "w") as f:
+                f.write("b")
+            os.link(os.path.join(source, "b"), os.path.join(source, "a"))
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode="w") as archive:
+                archive.add(source, arcname=".")
+                expect([m.islnk() for m in archive.getmembers()]).to(contain(True))
+        buffer.seek(0)
+        with dependency_context(supply_fs=True) as context:
+            context.import_fs(buffer, target="/imported")
+            expect((read("/imported/a"), read("/imported/b"))).to(equal(("b", "b")))
+
+    def import_member(self, member, target="/imported"):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as archive:
+            archive.addfile(member, io.BytesIO(b"x" * member.size))
+        buffer.seek(0)
+        with dependency_context(supply_fs=True) as context:
+            context.import_fs(buffer, target=target)
+
+    def test_refuses_member_outside_target(self):
+        for name in ("../escaped", "sub/../../escaped", "/etc/escaped"):
+            member = tarfile.TarInfo(name)
+            member.size = 1
+            expect(lambda: self.import_member(member)).to(raise_error(ValueError))
+
+    def test_refuses_hard_link_outside_target(self):
+        member = tarfile.TarInfo("link")
+        member.type = tarfile.LNKTYPE
+        member.linkname = "../etc/passwd"
+        expect(lambda: self.import_member(member)).to(raise_error(ValueError))
+
+    def test_refuses_unsupported_member(self):
+        member = tarfile.TarInfo("pipe")
+        member.type = tarfile.FIFOTYPE
+        expect(lambda: self.import_member(member)).to(raise_error(ValueError))
+
+
+if "__main__" == __name__:
+    main()
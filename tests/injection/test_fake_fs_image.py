@@ -0,0 +1,144 @@
+import io
+import os
+import tarfile
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from expects import expect, be_false, be_true, equal, raise_error
+
+from twin_sister import (
+    FakeFsImage,
+    close_all_dependency_contexts,
+    dependency,
+    dependency_context,
+    open_dependency_context,
+)
+from twin_sister.fakes import FunctionSpy
+
+
+def read(filename):
+    with dependency(open)(filename) as f:
+        return f.read()
+
+
+def build_config(fs):
+    fs.create_file("/etc/app/app.ini", contents="[app]\n")
+    fs.create_file("/opt/app/bin/run", contents="#!/bin/sh\n", st_mode=0o100755)
+
+
+class TestFakeFsImage(TestCase):
+    def tearDown(self):
+        close_all_dependency_contexts()
+
+    def test_context_sees_files_from_builder(self):
+        with dependency_context(supply_fs=FakeFsImage(build_config)):
+            expect(read("/etc/app/app.ini")).to(equal("[app]\n"))
+
+    def test_keeps_file_mode(self):
+        with dependency_context(supply_fs=FakeFsImage(build_config)):
+            expect(dependency(os).stat("/opt/app/bin/run").st_mode & 0o777).to(equal(0o755))
+
+    def test_builds_image_once(self):
+        spy = FunctionSpy()
+        image = FakeFsImage(spy)
+        for _ in range(3):
+            with dependency_context(supply_fs=image) as context:
+                context.fs
+        expect(len(spy.call_history)).to(equal(1))
+
+    def test_does_not_build_image_until_used(self):
+        spy = FunctionSpy()
+        with dependency_context(supply_fs=FakeFsImage(spy)):
+            pass
+        expect(spy.call_history).to(equal([]))
+
+    def test_changes_do_not_reach_image(self):
+        image = FakeFsImage(build_config)
+        with dependency_context(supply_fs=image) as context:
+            context.create_file("/etc/app/app.ini", text="changed")
+            context.create_file("/etc/app/extra.ini")
+        with dependency_context(supply_fs=image):
+            expect(read("/etc/app/app.ini")).to(equal("[app]\n"))
+            expect(dependency(os).path.exists("/etc/app/extra.ini")).to(be_false)
+
+    def test_removing_file_does_not_affect_other_copies(self):
+        image = FakeFsImage(build_config)
+        with dependency_context(supply_fs=image) as first:
+            with dependency_context(supply_fs=image) as second:
+                first.os.remove("/etc/app/app.ini")
+                expect(second.os.path.exists("/etc/app/app.ini")).to(be_true)
+
+    def test_reset_restores_image(self):
+        with dependency_context(supply_fs=FakeFsImage(build_config)) as context:
+            context.os.remove("/etc/app/app.ini")
+            context.create_file("/spam")
+            context.reset()
+            expect(read("/etc/app/app.ini")).to(equal("[app]\n"))
+            expect(context.os.path.exists("/spam")).to(be_false)
+
+    def test_reset_replaces_fake_open_already_used(self):
+        with dependency_context(supply_fs=FakeFsImage(build_config)) as context:
+            context.create_file("/spam")
+            read("/spam")
+            context.reset()
+            expect(lambda: read("/spam")).to(raise_error(FileNotFoundError))
+
+    def test_recycled_context_starts_with_image(self):
+        image = FakeFsImage(build_config)
+        context = open_dependency_context(supply_fs=image, recycle=True)
+        context.create_file("/spam")
+        context.close()
+        recycled = open_dependency_context(supply_fs=image, recycle=True)
+        expect(recycled is context).to(be_true)
+        expect(recycled.os.path.exists("/spam")).to(be_false)
+        expect(recycled.os.path.exists("/etc/app/app.ini")).to(be_true)
+
+    def test_fork_copies_changed_image(self):
+        with dependency_context(supply_fs=FakeFsImage(build_config)) as context:
+            context.create_file("/etc/app/extra.ini", text="extra")
+            forked = context.fork()
+            expect(forked.get(open)("/etc/app/extra.ini").read()).to(equal("extra"))
+            expect(forked.get(open)("/etc/app/app.ini").read()).to(equal("[app]\n"))
+
+    def test_from_directory(self):
+        with TemporaryDirectory() as path:
+            os.makedirs(os.path.join(path, "conf", "empty"))
+            with open(os.path.join(path, "conf", "a.ini"), "w") as f:
+                f.write("a")
+            image = FakeFsImage.from_directory(path, target="/etc/app")
+            with dependency_context(supply_fs=image):
+                expect(read("/etc/app/conf/a.ini")).to(equal("a"))
+                expect(dependency(os).path.isdir("/etc/app/conf/empty")).to(be_true)
+
+    def test_from_directory_defaults_to_same_path(self):
+        with TemporaryDirectory() as path:
+            with open(os.path.join(path, "a.ini"), "w") as f:
+                f.write("a")
+            image = FakeFsImage.from_directory(path)
+            with dependency_context(supply_fs=image):
+                expect(read(os.path.join(path, "a.ini"))).to(equal("a"))
+
+    def test_from_tarball(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            directory = tarfile.TarInfo("etc/app")
+            directory.type = tarfile.DIRTYPE
+            directory.mode = 0o755
+            archive.addfile(directory)
+            content = b"[app]\n"
+            info = tarfile.TarInfo("etc/app/app.ini")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+            link = tarfile.TarInfo("etc/current.ini")
+            link.type = tarfile.SYMTYPE
+            link.linkname = "app/app.ini"
+            archive.addfile(link)
+        buffer.seek(0)
+        image = FakeFsImage.from_tarball(buffer, target="/")
+        with dependency_context(supply_fs=image):
+            expect(read("/etc/app/app.ini")).to(equal("[app]\n"))
+            expect(read("/etc/current.ini")).to(equal("[app]\n"))
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,161 @@
+import logging
+import os
+from unittest import TestCase, main
+
+from expects import expect, be, be_empty, be_false, be_true, equal, raise_error
+
+from twin_sister import dependency, dependency_context
+from twin_sister.injection.dependency_context import DependencyContext
+
+
+class Thing:
+    pass
+
+
+class TestForkContext(TestCase):
+    def test_fork_sees_original_injections(self):
+        injected = object()
+        original = DependencyContext()
+        original.inject(Thing, injected)
+        expect(original.fork().get(Thing)).to(be(injected))
+
+    def test_injection_into_fork_does_not_affect_original(self):
+        original = DependencyContext()
+        original.inject(Thing, "original")
+        original.fork().inject(Thing, "fork")
+        expect(original.get(Thing)).to(equal("original"))
+
+    def test_injection_into_original_does_not_affect_fork(self):
+        original = DependencyContext()
+        original.inject(Thing, "original")
+        fork = original.fork()
+        original.inject(Thing, "changed")
+        expect(fork.get(Thing)).to(equal("original"))
+
+    def test_fork_shares_parent(self):
+        parent = DependencyContext()
+        parent.inject(Thing, "parent")
+        fork = parent.spawn().fork()
+        parent.inject(Thing, "changed")
+        expect(fork.get(Thing)).to(equal("changed"))
+
+    def test_fork_sees_original_environment(self):
+        original = DependencyContext(supply_env=True)
+        original.set_env(SPAM="eggs")
+        expect(original.fork().os.environ).to(equal({"SPAM": "eggs"}))
+
+    def test_environment_changes_stay_separate(self):
+        original = DependencyContext(supply_env=True)
+        original.set_env(SPAM="eggs", PARROT="dead")
+        fork = original.fork()
+        fork.set_env(SPAM="spam")
+        original.unset_env("PARROT")
+        expect((original.os.environ, fork.os.environ)).to(
+            equal(({"SPAM": "eggs"}, {"SPAM": "spam", "PARROT": "dead"}))
+        )
+
+    def test_unset_env_still_complains_about_missing_variable(self):
+        context = DependencyContext(supply_env=True)
+        expect(lambda: context.unset_env("SPAM")).to(raise_error(KeyError))
+
+    def test_fork_supplies_its_own_os(self):
+        original = DependencyContext(supply_env=True)
+        fork = original.fork()
+        expect(fork.get(os)).to(be(fork.os))
+        expect(fork.os).not_to(be(original.os))
+
+    def test_fork_sees_original_files(self):
+        original = DependencyContext(supply_fs=True)
+        original.create_file("/spam/eggs", text="sausage")
+        fork = original.fork()
+        with fork.get(open)("/spam/eggs") as f:
+            expect(f.read()).to(equal("sausage"))
+
+    def test_file_changes_stay_separate(self):
+        original = DependencyContext(supply_fs=True)
+        original.create_file("/spam/eggs", text="sausage")
+        fork = original.fork()
+        fork.create_file("/spam/beans", text="baked")
+        fork.os.remove("/spam/eggs")
+        expect(original.os.listdir("/spam")).to(equal(["eggs"]))
+        expect(fork.os.listdir("/spam")).to(equal(["beans"]))
+
+    def test_original_file_changes_do_not_reach_fork(self):
+        original = DependencyContext(supply_fs=True)
+        original.create_file("/spam/eggs", text="sausage")
+        fork = original.fork()
+        original.create_file("/spam/beans", text="baked")
+        with original.get(open)("/spam/eggs", "a") as f:
+            f.write(" and spam")
+        expect(fork.os.listdir("/spam")).to(equal(["eggs"]))
+        with fork.get(open)("/spam/eggs") as f:
+            expect(f.read()).to(equal("sausage"))
+
+    def test_fork_keeps_files_when_original_is_reset(self):
+        original = DependencyContext(supply_fs=True)
+        original.create_file("/spam", text="eggs")
+        fork = original.fork()
+        original.reset()
+        original.create_file("/other")
+        expect((fork.os.path.exists("/spam"), fork.os.path.exists("/other"))).to(equal((True, False)))
+
+    def test_fork_of_unused_fork_gets_its_own_copy(self):
+        original = DependencyContext(supply_fs=True)
+        original.create_file("/spam")
+        first = original.fork()
+        second = first.fork()
+        first.os.remove("/spam")
+        expect(second.os.path.exists("/spam")).to(be_true)
+
+    def test_environ_changes_through_dependency_stay_separate(self):
+        original = DependencyContext(supply_env=True)
+        original.set_env(SPAM="eggs")
+        fork = original.fork()
+        with dependency_context(parent=fork):
+            dependency(os).environ["PARROT"] = "dead"
+        with dependency_context(parent=original):
+            dependency(os).environ["SPAM"] = "spam"
+        expect((original.os.environ, fork.os.environ)).to(
+            equal(({"SPAM": "spam"}, {"SPAM": "eggs", "PARROT": "dead"}))
+        )
+
+    def test_fork_does_not_copy_filesystem_until_used(self):
+        original = DependencyContext(supply_fs=True)
+        fork = original.fork()
+        expect(fork._filesystem.is_built).to(be_false)
+        fork.os.path.exists("/")
+        expect(fork._filesystem.is_built).to(be_true)
+
+    def test_injected_fs_fakes_belong_to_fork(self):
+        original = DependencyContext(supply_fs=True)
+        fork = original.fork()
+        with fork.get(open)("/spam", "w") as f:
+            f.write("eggs")
+        expect(fork.get(os.path).exists("/spam")).to(be_true)
+        expect(original.get(os.path).exists("/spam")).to(be_false)
+
+    def test_fork_keeps_injections_over_supplied_fakes(self):
+        original = DependencyContext(supply_fs=True, supply_logging=True)
+        fake_open, fake_logging, fake_os = object(), object(), object()
+        original.inject(open, fake_open)
+        original.inject(logging, fake_logging)
+        original.inject(os, fake_os)
+        fork = original.fork()
+        expect((fork.get(open), fork.get(logging), fork.get(os))).to(equal((fake_open, fake_logging, fake_os)))
+
+    def test_fork_gets_fresh_logging(self):
+        original = DependencyContext(supply_logging=True)
+        original.get(logging).getLogger("spam").error("eggs")
+        fork = original.fork()
+        expect(fork.get(logging)).to(be(fork.logging))
+        expect(fork.logging.stored_records).to(be_empty)
+
+    def test_fork_can_be_a_parent(self):
+        original = DependencyContext()
+        original.inject(Thing, "fake")
+        with dependency_context(parent=original.fork()):
+            expect(dependency(Thing)).to(equal("fake"))
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,77 @@
+import os
+from threading import Event, Thread
+from unittest import TestCase, main, skipUnless
+
+from expects import expect, equal
+
+from twin_sister import close_all_dependency_contexts, dependency, dependency_context
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+def in_child(fn):
+    """
+    Fork, call fn in the child, and return what it returned (as a string)
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if 0 == pid:
+        os.close(read_end)
+        try:
+            os.write(write_end, str(fn()).encode("utf-8"))
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as f:
+        returned = f.read().decode("utf-8")
+    os.waitpid(pid, 0)
+    return returned
+
+
+@skipUnless(hasattr(os, "fork"), "requires os.fork")
+class TestForkSafety(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def tearDown(self):
+        DependencyRegistry.carry_context_across_fork = False
+
+    def test_child_does_not_inherit_context(self):
+        with dependency_context() as context:
+            context.inject("spam", "eggs")
+            expect(in_child(lambda: dependency("spam"))).to(equal("spam"))
+
+    def test_child_starts_with_empty_registry(self):
+        finish = Event()
+        t = Thread(target=finish.wait, daemon=True)
+        t.start()
+        try:
+            with dependency_context() as context:
+                context.attach_to_thread(t)
+                expect(in_child(lambda: DependencyRegistry.stats())).to(
+                    equal(str({"thread_stacks": 0, "contexts": 0, "registrations": 0}))
+                )
+        finally:
+            finish.set()
+
+    def test_child_can_carry_current_context(self):
+        DependencyRegistry.carry_context_across_fork = True
+        with dependency_context() as context:
+            context.inject("spam", "eggs")
+            expect(in_child(lambda: dependency("spam"))).to(equal("eggs"))
+
+    def test_carried_context_is_the_only_registration(self):
+        DependencyRegistry.carry_context_across_fork = True
+        with dependency_context():
+            with dependency_context():
+                expect(in_child(lambda: DependencyRegistry.registration_count)).to(equal("1"))
+
+    def test_parent_keeps_its_context(self):
+        DependencyRegistry.carry_context_across_fork = True
+        with dependency_context() as context:
+            context.inject("spam", "eggs")
+            in_child(lambda: None)
+            expect(dependency("spam")).to(equal("eggs"))
+
+
+if "__main__" == __name__:
+    main()
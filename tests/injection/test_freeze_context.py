@@ -0,0 +1,99 @@
+from threading import Thread
+from unittest import TestCase, main
+
+from expects import expect, be, equal, raise_error
+
+from twin_sister import dependency, dependency_context
+from twin_sister.exceptions import FrozenContextError
+from twin_sister.injection.dependency_context import DependencyContext
+
+
+class Thing:
+    pass
+
+
+class TestFreezeContext(TestCase):
+    def test_returns_injected(self):
+        injected = object()
+        context = DependencyContext()
+        context.inject(Thing, injected)
+        expect(context.freeze().get(Thing)).to(be(injected))
+
+    def test_returns_original_if_not_injected(self):
+        expect(DependencyContext().freeze().get(Thing)).to(be(Thing))
+
+    def test_flattens_ancestors(self):
+        parent = DependencyContext()
+        parent.inject(Thing, "parent thing")
+        parent.inject("spam", "parent spam")
+        child = parent.spawn()
+        child.inject("spam", "child spam")
+        frozen = child.freeze()
+        expect((frozen.get(Thing), frozen.get("spam"))).to(equal(("parent thing", "child spam")))
+
+    def test_child_overrides_unhashable_from_parent(self):
+        key = ["spam"]
+        parent = DependencyContext()
+        parent.inject(key, "parent")
+        child = parent.spawn()
+        child.inject(key, "child")
+        expect(child.freeze().get(key)).to(equal("child"))
+
+    def test_exposes_read_only_mapping(self):
+        context = DependencyContext()
+        context.inject(Thing, "fake")
+        frozen = context.freeze()
+        expect(frozen.injections[Thing]).to(equal("fake"))
+
+        def attempt():
+            frozen.injections[Thing] = "other"
+
+        expect(attempt).to(raise_error(TypeError))
+
+    def test_unaffected_by_later_injection(self):
+        context = DependencyContext()
+        context.inject(Thing, "before")
+        frozen = context.freeze()
+        context.inject(Thing, "after")
+        expect(frozen.get(Thing)).to(equal("before"))
+
+    def test_refuses_injection(self):
+        frozen = DependencyContext().freeze()
+        for method in (frozen.inject, frozen.inject_as_class, frozen.inject_as_singleton):
+            expect(lambda: method(Thing, "fake")).to(raise_error(FrozenContextError))
+        expect(lambda: frozen.inject_many({Thing: "fake"})).to(raise_error(FrozenContextError))
+
+    def test_resolves_lazy_factory(self):
+        context = DependencyContext()
+        context.inject_factory(Thing, object)
+        frozen = context.freeze()
+        expect(frozen.get(Thing)).to(be(frozen.get(Thing)))
+
+    def test_keeps_fake_os_and_logging(self):
+        context = DependencyContext(supply_env=True, supply_logging=True)
+        frozen = context.freeze()
+        expect((frozen.os, frozen.logging)).to(equal((context.os, context.logging)))
+
+    def test_cannot_be_a_parent(self):
+        frozen = DependencyContext().freeze()
+        expect(lambda: DependencyContext(parent=frozen)).to(raise_error(ValueError))
+
+    def test_can_be_attached_to_threads(self):
+        seen = []
+        with dependency_context() as context:
+            context.inject(Thing, "fake")
+            frozen = context.freeze()
+
+        def canary():
+            frozen.attach_to_thread(t)
+            seen.append(dependency(Thing))
+
+        t = Thread(target=canary)
+        t.start()
+        t.join()
+        frozen.close()
+        expect(seen).to(equal(["fake"]))
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,166 @@
+import io
+import os
+from unittest import TestCase, main
+
+from expects import expect, be, be_a, equal, raise_error
+from pyfakefs import fake_filesystem as fakefs
+
+from twin_sister import dependency, dependency_context
+from twin_sister.injection.fs_stats import FsStats
+
+
+def read(filename, mode="r"):
+    with dependency(open)(filename, mode) as f:
+        return f.read()
+
+
+class TestFsStats(TestCase):
+    def test_starts_at_zero(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/input.csv", text="1,2\n")
+            context.enable_fs_stats()
+            expect(context.fs_stats()).to(
+                equal(
+                    {
+                        "opens": 0,
+                        "reads": 0,
+                        "writes": 0,
+                        "bytes_read": 0,
+                        "bytes_written": 0,
+                        "stat_calls": 0,
+                        "listdir_calls": 0,
+                        "paths": {},
+                    }
+                )
+            )
+
+    def test_counts_reads_per_path(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/input.csv": "1,2\n3,4\n", "/other": "x"})
+            context.enable_fs_stats()
+            read("/input.csv")
+            read("/input.csv", "rb")
+            read("/other")
+            expect(context.fs_stats()["paths"]["/input.csv"]).to(
+                equal({"opens": 2, "reads": 2, "writes": 0, "bytes_read": 16, "bytes_written": 0})
+            )
+            expect(context.fs_stats()["opens"]).to(equal(3))
+
+    def test_counts_lines_read_by_iteration(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/input.csv", text="1,2\n3,4\n")
+            context.enable_fs_stats()
+            with dependency(open)("/input.csv") as f:
+                expect(list(f)).to(equal(["1,2\n", "3,4\n"]))
+            expect(context.fs_stats()["reads"]).to(equal(2))
+
+    def test_counts_writes_per_path(self):
+        with dependency_context(supply_fs=True) as context:
+            context.enable_fs_stats()
+            with dependency(open)("/report.txt", "w") as f:
+                f.write("spam")
+                f.writelines(["eggs", "sausage"])
+            expect(context.fs_stats()["paths"]["/report.txt"]).to(
+                equal({"opens": 1, "reads": 0, "writes": 2, "bytes_read": 0, "bytes_written": 15})
+            )
+
+    def test_counts_os_level_io(self):
+        with dependency_context(supply_fs=True) as context:
+            context.enable_fs_stats()
+            fake_os = dependency(os)
+            fd = fake_os.open("/data", os.O_CREAT | os.O_RDWR)
+            fake_os.write(fd, b"spam")
+            fake_os.lseek(fd, 0, os.SEEK_SET)
+            fake_os.read(fd, 2)
+            fake_os.close(fd)
+            expect(context.fs_stats()["paths"]["/data"]).to(
+                equal({"opens": 1, "reads": 1, "writes": 1, "bytes_read": 2, "bytes_written": 4})
+            )
+
+    def test_counts_stat_calls(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam")
+            context.enable_fs_stats()
+            dependency(os).stat("/spam")
+            dependency(os.path).exists("/spam")
+            dependency(os).path.isfile("/spam")
+            dependency(os.path).join("/", "spam")
+            expect(context.fs_stats()["stat_calls"]).to(equal(3))
+
+    def test_counts_listdir_calls(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam/eggs")
+            context.enable_fs_stats()
+            dependency(os).listdir("/spam")
+            list(dependency(os).scandir("/spam"))
+            expect(context.fs_stats()["listdir_calls"]).to(equal(2))
+
+    def test_counts_directories_listed_by_walk(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_files({"/spam/eggs/beans": "", "/spam/sausage": ""})
+            context.enable_fs_stats()
+            list(dependency(os).walk("/spam"))
+            expect(context.fs_stats()["listdir_calls"]).to(equal(2))
+
+    def test_counted_file_still_looks_like_a_file(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam", text="eggs")
+            context.enable_fs_stats()
+            with dependency(open)("/spam") as f:
+                expect(f).to(be_a(io.IOBase))
+
+    def test_enable_returns_stats(self):
+        with dependency_context(supply_fs=True) as context:
+            expect(context.enable_fs_stats()).to(be_a(FsStats))
+
+    def test_counts_from_child_context(self):
+        with dependency_context(supply_fs=True) as parent:
+            parent.create_file("/spam", text="eggs")
+            with dependency_context(parent=parent) as child:
+                child.enable_fs_stats()
+                read("/spam")
+                expect(child.fs_stats()["bytes_read"]).to(equal(4))
+
+    def test_stops_counting_when_disabled(self):
+        with dependency_context(supply_fs=True) as context:
+            context.create_file("/spam", text="eggs")
+            context.enable_fs_stats()
+            context.disable_fs_stats()
+            read("/spam")
+            expect(context.fs_stats).to(raise_error(RuntimeError))
+
+    def test_fakes_are_the_plain_pyfakefs_ones_when_disabled(self):
+        with dependency_context(supply_fs=True) as context:
+            context.enable_fs_stats()
+            context.disable_fs_stats()
+            expect(dependency(open)).to(be_a(fakefs.FakeFileOpen))
+
+    def test_fake_os_still_looks_like_fake_os(self):
+        with dependency_context(supply_fs=True) as context:
+            context.enable_fs_stats()
+            expect(context.os).to(be_a(fakefs.FakeOsModule))
+
+    def test_keeps_open_injected_over_fake(self):
+        replacement = object()
+        with dependency_context(supply_fs=True) as context:
+            context.inject(open, replacement)
+            context.enable_fs_stats()
+            expect(dependency(open)).to(be(replacement))
+
+    def test_reset_stops_counting(self):
+        with dependency_context(supply_fs=True) as context:
+            context.enable_fs_stats()
+            context.reset()
+            expect(context.fs_stats).to(raise_error(RuntimeError))
+
+    def test_complains_when_not_enabled(self):
+        with dependency_context(supply_fs=True) as context:
+            expect(context.fs_stats).to(raise_error(RuntimeError))
+
+    def test_complains_without_fake_filesystem(self):
+        with dependency_context() as context:
+            expect(context.enable_fs_stats).to(raise_error(RuntimeError))
+
+
+if "__main__" == __name__:
+    main()
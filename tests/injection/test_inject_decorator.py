@@ -0,0 +1,150 @@
+from datetime import datetime
+import gc
+from threading import Thread
+import weakref
+from unittest import TestCase, main
+
+from expects import expect, be, be_none, equal, raise_error
+
+from twin_sister import dependency_context, inject
+from twin_sister.fakes import FunctionSpy
+from twin_sister.injection.dependency_context import DependencyContext
+
+
+class HttpClient:
+    pass
+
+
+@inject(client=HttpClient, clock=datetime)
+def fetch(url, *, client, clock):
+    return url, client, clock
+
+
+@inject(client=HttpClient)
+def positional(client, other=None):
+    return client
+
+
+class TestInjectDecorator(TestCase):
+    def test_passes_real_objects_without_context(self):
+        expect(fetch("spam")).to(equal(("spam", HttpClient, datetime)))
+
+    def test_passes_injected_objects(self):
+        fake_client = object()
+        fake_clock = object()
+        with dependency_context() as context:
+            context.inject_many({HttpClient: fake_client, datetime: fake_clock})
+            expect(fetch("spam")).to(equal(("spam", fake_client, fake_clock)))
+
+    def test_caller_can_override_by_keyword(self):
+        mine = object()
+        with dependency_context() as context:
+            context.inject(HttpClient, object())
+            expect(fetch("spam", client=mine)[1]).to(be(mine))
+
+    def test_caller_can_override_by_position(self):
+        mine = object()
+        with dependency_context() as context:
+            context.inject(HttpClient, object())
+            expect(positional(mine)).to(be(mine))
+
+    def test_sees_injection_made_after_earlier_call(self):
+        second = object()
+        with dependency_context() as context:
+            context.inject(HttpClient, object())
+            fetch("spam")
+            context.inject(HttpClient, second)
+            expect(fetch("spam")[1]).to(be(second))
+
+    def test_sees_injection_into_parent_after_earlier_call(self):
+        injected = object()
+        with dependency_context() as parent:
+            with dependency_context(parent=parent):
+                fetch("spam")
+                parent.inject(HttpClient, injected)
+                expect(fetch("spam")[1]).to(be(injected))
+
+    def test_switches_with_current_context(self):
+        first = object()
+        second = object()
+        with dependency_context() as outer:
+            outer.inject(HttpClient, first)
+            fetch("spam")
+            with dependency_context() as inner:
+                inner.inject(HttpClient, second)
+                expect(fetch("spam")[1]).to(be(second))
+            expect(fetch("spam")[1]).to(be(first))
+
+    def test_reverts_to_real_objects_after_context_closes(self):
+        with dependency_context() as context:
+            context.inject(HttpClient, object())
+            fetch("spam")
+        expect(fetch("spam")[1]).to(be(HttpClient))
+
+    def test_resolves_lazy_factory(self):
+        with dependency_context() as context:
+            context.inject_factory(HttpClient, object, scope="thread")
+            expect(fetch("spam")[1]).to(be(fetch("eggs")[1]))
+
+    def test_does_not_resolve_again_while_nothing_changes(self):
+        factory = FunctionSpy(return_value="fake")
+        with dependency_context() as context:
+            context.inject_factory(HttpClient, factory)
+            fetch("spam")
+            fetch("eggs")
+        expect(len(factory.call_history)).to(equal(1))
+
+    def test_profiler_sees_resolutions(self):
+        with dependency_context() as context:
+            context.enable_profiling()
+            fetch("spam")
+            expect(context.resolution_report()["resolutions"]).to(equal(2))
+
+    def test_does_not_keep_closed_context_alive(self):
+        with dependency_context() as context:
+            context.inject(HttpClient, object())
+            fetch("spam")
+            ref = weakref.ref(context)
+        del context
+        gc.collect()
+        expect(ref()).to(be_none)
+
+    def test_passes_objects_from_frozen_context(self):
+        fake_client = object()
+        context = DependencyContext()
+        context.inject(HttpClient, fake_client)
+        frozen = context.freeze()
+        seen = []
+
+        def canary():
+            frozen.attach_to_thread(t)
+            seen.append(fetch("spam"))
+
+        t = Thread(target=canary)
+        t.start()
+        t.join()
+        frozen.close()
+        expect(seen).to(equal([("spam", fake_client, datetime)]))
+
+    def test_preserves_function_name(self):
+        expect(fetch.__name__).to(equal("fetch"))
+
+    def test_complains_about_unknown_parameter(self):
+        def attempt():
+            @inject(nonexistent=HttpClient)
+            def f(client):
+                pass
+
+        expect(attempt).to(raise_error(TypeError))
+
+    def test_complains_about_positional_only_parameter(self):
+        def attempt():
+            @inject(args=HttpClient)
+            def f(*args):
+                pass
+
+        expect(attempt).to(raise_error(TypeError))
+
+
+if "__main__" == __name__:
+    main()
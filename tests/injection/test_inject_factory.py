@@ -0,0 +1,80 @@
+import asyncio
+from threading import Thread
+from unittest import TestCase, main
+
+from expects import expect, be, equal, raise_error
+
+from twin_sister import dependency, dependency_context
+from twin_sister.fakes import FunctionSpy
+
+
+class Thing:
+    pass
+
+
+class TestInjectFactory(TestCase):
+    def test_does_not_call_factory_before_resolution(self):
+        factory = FunctionSpy()
+        with dependency_context() as context:
+            context.inject_factory(Thing, factory)
+        expect(factory.call_history).to(equal([]))
+
+    def test_returns_built_object(self):
+        built = object()
+        with dependency_context() as context:
+            context.inject_factory(Thing, lambda: built)
+            expect(dependency(Thing)).to(be(built))
+
+    def test_context_scope_builds_once(self):
+        with dependency_context() as context:
+            context.inject_factory(Thing, object)
+            expect(dependency(Thing)).to(be(dependency(Thing)))
+
+    def test_spawned_context_shares_built_object(self):
+        with dependency_context() as context:
+            context.inject_factory(Thing, object)
+            expect(context.spawn().get(Thing)).to(be(dependency(Thing)))
+
+    def test_thread_scope_builds_once_per_thread(self):
+        seen_by_thread = None
+        with dependency_context() as context:
+            context.inject_factory(Thing, object, scope="thread")
+
+            def canary():
+                nonlocal seen_by_thread
+                seen_by_thread = context.get(Thing)
+
+            t = Thread(target=canary)
+            t.start()
+            t.join()
+            expect(dependency(Thing)).to(be(dependency(Thing)))
+            expect(dependency(Thing)).not_to(be(seen_by_thread))
+
+    def test_task_scope_builds_once_per_task(self):
+        with dependency_context() as context:
+            context.inject_factory(Thing, object, scope="task")
+
+            async def canary():
+                first = dependency(Thing)
+                await asyncio.sleep(0)
+                expect(dependency(Thing)).to(be(first))
+                return first
+
+            async def run_all():
+                return await asyncio.gather(canary(), canary())
+
+            first, second = asyncio.run(run_all())
+            expect(first).not_to(be(second))
+
+    def test_task_scope_complains_outside_task(self):
+        with dependency_context() as context:
+            context.inject_factory(Thing, object, scope="task")
+            expect(lambda: dependency(Thing)).to(raise_error(RuntimeError))
+
+    def test_complains_about_unknown_scope(self):
+        with dependency_context() as context:
+            expect(lambda: context.inject_factory(Thing, object, scope="galaxy")).to(raise_error(ValueError))
+
+
+if "__main__" == __name__:
+    main()
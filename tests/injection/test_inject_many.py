@@ -0,0 +1,89 @@
+from unittest import TestCase, main
+
+from expects import expect, be
+
+from twin_sister import InjectionSet, dependency, dependency_context
+
+
+class Thing:
+    pass
+
+
+class OtherThing:
+    pass
+
+
+class TestInjectMany(TestCase):
+    def test_injects_mapping(self):
+        fake_thing = object()
+        fake_other = object()
+        with dependency_context() as context:
+            context.inject_many({Thing: fake_thing, OtherThing: fake_other})
+            expect(dependency(Thing)).to(be(fake_thing))
+            expect(dependency(OtherThing)).to(be(fake_other))
+
+    def test_injects_pairs_including_unhashable(self):
+        unhashable = ["spam"]
+        fake = object()
+        with dependency_context() as context:
+            context.inject_many([(unhashable, fake)])
+            expect(dependency(unhashable)).to(be(fake))
+
+    def test_replaces_earlier_injection(self):
+        fake = object()
+        with dependency_context() as context:
+            context.inject(Thing, object())
+            context.inject_many({Thing: fake})
+            expect(dependency(Thing)).to(be(fake))
+
+    def test_invalidates_cached_resolution(self):
+        fake = object()
+        with dependency_context() as parent:
+            child = parent.spawn()
+            child.get(Thing)
+            parent.inject_many({Thing: fake})
+            expect(child.get(Thing)).to(be(fake))
+
+    def test_injects_as_class(self):
+        instance = object()
+        with dependency_context() as context:
+            context.inject_many_as_class({Thing: instance})
+            expect(dependency(Thing)()).to(be(instance))
+
+    def test_injects_as_singleton(self):
+        instance = object()
+        with dependency_context() as context:
+            context.inject_many_as_singleton({Thing: instance})
+            expect(dependency(Thing).instance()).to(be(instance))
+
+
+class TestInjectionSet(TestCase):
+    def test_can_be_applied_to_many_contexts(self):
+        fake = object()
+        shared = InjectionSet().inject(Thing, fake)
+        for _ in range(2):
+            with dependency_context() as context:
+                context.inject_many(shared)
+                expect(dependency(Thing)).to(be(fake))
+
+    def test_accepts_initial_mapping(self):
+        fake = object()
+        with dependency_context() as context:
+            context.inject_many(InjectionSet({Thing: fake}))
+            expect(dependency(Thing)).to(be(fake))
+
+    def test_injects_as_class(self):
+        instance = object()
+        with dependency_context() as context:
+            context.inject_many(InjectionSet().inject_as_class(Thing, instance))
+            expect(dependency(Thing)()).to(be(instance))
+
+    def test_injects_as_singleton(self):
+        instance = object()
+        with dependency_context() as context:
+            context.inject_many(InjectionSet().inject_as_singleton(Thing, instance))
+            expect(dependency(Thing).instance()).to(be(instance))
+
+
+if "__main__" == __name__:
+    main()
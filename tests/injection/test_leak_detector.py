@@ -0,0 +1,112 @@
+from threading import Event, Thread
+from unittest import TestCase, main
+
+from expects import expect, be, be_above, be_empty, be_none, contain, equal
+
+from twin_sister import close_all_dependency_contexts, dependency, dependency_context, open_dependency_context
+from twin_sister.injection.dependency_registry import DependencyRegistry
+from twin_sister.injection.leak_detector import LeakDetector
+
+
+class TestLeakDetector(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def tearDown(self):
+        LeakDetector.disable()
+        close_all_dependency_contexts()
+
+    def test_finds_context_left_open(self):
+        detector = LeakDetector()
+        leaked = open_dependency_context()
+        expect([leak.context for leak in detector.find_leaks()]).to(equal([leaked]))
+
+    def test_ignores_closed_context(self):
+        detector = LeakDetector()
+        with dependency_context():
+            pass
+        expect(detector.find_leaks()).to(be_empty)
+
+    def test_ignores_context_open_before_checkpoint(self):
+        open_dependency_context()
+        detector = LeakDetector()
+        expect(detector.find_leaks()).to(be_empty)
+
+    def test_checkpoint_moves_baseline(self):
+        detector = LeakDetector()
+        open_dependency_context()
+        detector.checkpoint()
+        expect(detector.find_leaks()).to(be_empty)
+
+    def test_reports_attached_threads(self):
+        finish = Event()
+        t = Thread(target=finish.wait, daemon=True)
+        t.start()
+        try:
+            detector = LeakDetector()
+            context = open_dependency_context()
+            context.attach_to_thread(t)
+            (leak,) = detector.find_leaks()
+            expect(leak.thread_ids).to(contain(t.ident))
+            expect(len(leak.thread_ids)).to(equal(2))
+        finally:
+            finish.set()
+
+    def test_records_creation_stack_when_enabled(self):
+        LeakDetector.enable()
+        detector = LeakDetector()
+        open_dependency_context()
+        (leak,) = detector.find_leaks()
+        expect(leak.creation_stack[-1].name).to(equal("test_records_creation_stack_when_enabled"))
+
+    def test_blames_whoever_acquired_recycled_context(self):
+        LeakDetector.enable()
+
+        def first_test():
+            open_dependency_context(recycle=True).close()
+
+        def second_test():
+            return open_dependency_context(recycle=True)
+
+        first_test()
+        detector = LeakDetector()
+        second_test()
+        (leak,) = detector.find_leaks()
+        expect(leak.creation_stack[-1].name).to(equal("second_test"))
+
+    def test_does_not_record_creation_stack_when_disabled(self):
+        detector = LeakDetector()
+        open_dependency_context()
+        (leak,) = detector.find_leaks()
+        expect(leak.creation_stack).to(be_none)
+
+    def test_estimates_retained_size(self):
+        detector = LeakDetector()
+        small = open_dependency_context()
+        big = open_dependency_context()
+        big.inject("spam", bytes(100000))
+        sizes = {id(leak.context): leak.retained_size() for leak in detector.find_leaks()}
+        expect(sizes[id(big)]).to(be_above(sizes[id(small)] + 100000))
+
+    def test_close_leaks_closes_them(self):
+        detector = LeakDetector()
+        leaked = open_dependency_context()
+        leaked.inject("spam", "eggs")
+        expect([leak.context for leak in detector.close_leaks()]).to(equal([leaked]))
+        expect(dependency("spam")).to(equal("spam"))
+
+    def test_close_leaks_leaves_legitimate_contexts(self):
+        legitimate = open_dependency_context()
+        detector = LeakDetector()
+        open_dependency_context()
+        detector.close_leaks()
+        expect(DependencyRegistry.current_context()).to(be(legitimate))
+
+    def test_closes_leaks_on_exit_from_with_block(self):
+        with LeakDetector():
+            open_dependency_context()
+        expect(DependencyRegistry.registration_count).to(equal(0))
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,71 @@
+import sys
+from unittest import TestCase, main
+
+from expects import expect, be, be_false, be_true, equal, raise_error
+
+from twin_sister import dependency, dependency_context, register_service
+from twin_sister.injection.named_services import NamedServices, ServiceName
+
+HEAVY = "tests.injection.named_service_examples.heavy"
+
+
+class TestNamedServices(TestCase):
+    def setUp(self):
+        sys.modules.pop(HEAVY, None)
+
+    def test_registration_does_not_import(self):
+        register_service("billing_client", f"{HEAVY}:BillingClient")
+        expect(HEAVY in sys.modules).to(be_false)
+
+    def test_resolves_real_implementation(self):
+        register_service("billing_client", f"{HEAVY}:BillingClient")
+        expect(dependency.named("billing_client").__name__).to(equal("BillingClient"))
+        expect(HEAVY in sys.modules).to(be_true)
+
+    def test_resolves_dotted_attribute(self):
+        register_service("nested", f"{HEAVY}:BillingClient.Nested")
+        expect(dependency.named("nested").__qualname__).to(equal("BillingClient.Nested"))
+
+    def test_resolves_module(self):
+        register_service("heavy", HEAVY)
+        expect(dependency.named("heavy").__name__).to(equal(HEAVY))
+
+    def test_resolves_injected_replacement(self):
+        register_service("billing_client", f"{HEAVY}:BillingClient")
+        fake = object()
+        with dependency_context() as context:
+            context.inject_named("billing_client", fake)
+            expect(dependency.named("billing_client")).to(be(fake))
+        expect(HEAVY in sys.modules).to(be_false)
+
+    def test_replacement_needs_no_registration(self):
+        fake = object()
+        with dependency_context() as context:
+            context.inject_named("never registered", fake)
+            expect(dependency.named("never registered")).to(be(fake))
+
+    def test_child_context_inherits_replacement(self):
+        fake = object()
+        with dependency_context() as parent:
+            parent.inject_named("spam", fake)
+            with dependency_context(parent=parent):
+                expect(dependency.named("spam")).to(be(fake))
+
+    def test_complains_about_unknown_service(self):
+        expect(lambda: dependency.named("no such service")).to(raise_error(KeyError))
+
+    def test_reregistration_replaces_implementation(self):
+        register_service("replaceable", f"{HEAVY}:BillingClient")
+        dependency.named("replaceable")
+        register_service("replaceable", f"{HEAVY}:BillingClient.Nested")
+        expect(dependency.named("replaceable").__name__).to(equal("Nested"))
+
+    def test_key_is_always_the_same_object(self):
+        expect(NamedServices.key("spam")).to(be(NamedServices.key("spam")))
+
+    def test_keys_with_same_name_are_equal(self):
+        expect(ServiceName("spam")).to(equal(ServiceName("spam")))
+
+
+if "__main__" == __name__:
+    main()
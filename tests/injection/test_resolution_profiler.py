@@ -0,0 +1,92 @@
+import json
+from unittest import TestCase, main
+
+from expects import expect, be, be_above, be_none, contain, equal, raise_error
+
+from twin_sister import dependency, dependency_context
+
+
+class Thing:
+    pass
+
+
+class TestResolutionProfiler(TestCase):
+    def test_counts_resolutions_per_dependency(self):
+        with dependency_context() as context:
+            context.enable_profiling()
+            dependency(Thing)
+            dependency(Thing)
+            dependency(json)
+            report = context.resolution_report()
+        expect(report["by_dependency"]).to(equal({f"{__name__}.Thing": 2, "json": 1}))
+
+    def test_counts_total_resolutions(self):
+        with dependency_context() as context:
+            context.enable_profiling()
+            for _ in range(3):
+                dependency(Thing)
+            expect(context.resolution_report()["resolutions"]).to(equal(3))
+
+    def test_counts_levels_and_misses(self):
+        with dependency_context() as parent:
+            parent.inject(Thing, object())
+            with dependency_context(parent=parent) as child:
+                child.inject(json, object())
+                child.enable_profiling()
+                dependency(json)
+                dependency(Thing)
+                dependency(Thing)
+                dependency("unrelated")
+                expect(child.resolution_report()["by_level"]).to(equal({0: 1, 1: 2, "miss": 1}))
+
+    def test_accumulates_elapsed_time(self):
+        with dependency_context() as context:
+            context.enable_profiling()
+            dependency(Thing)
+            expect(context.resolution_report()["elapsed"]).to(be_above(0))
+
+    def test_samples_call_sites(self):
+        with dependency_context() as context:
+            context.enable_profiling(sample_every=2)
+            for _ in range(4):
+                dependency(Thing)
+            sites = context.resolution_report()["call_sites"]
+        expect(list(sites.values())).to(equal([2]))
+        expect(list(sites.keys())[0]).to(contain(__file__))
+
+    def test_does_not_sample_when_disabled(self):
+        with dependency_context() as context:
+            context.enable_profiling(sample_every=0)
+            dependency(Thing)
+            expect(context.resolution_report()["call_sites"]).to(equal({}))
+
+    def test_calls_hooks(self):
+        events = []
+        injected = object()
+        with dependency_context() as context:
+            context.inject(Thing, injected)
+            context.enable_profiling().add_hook(events.append)
+            expect(dependency(Thing)).to(be(injected))
+        expect([(e.dependency, e.level) for e in events]).to(equal([(Thing, 0)]))
+
+    def test_hook_event_has_no_call_site_unless_sampled(self):
+        events = []
+        with dependency_context() as context:
+            context.enable_profiling(sample_every=0).add_hook(events.append)
+            dependency(Thing)
+        expect(events[0].call_site).to(be_none)
+
+    def test_stops_counting_when_disabled(self):
+        with dependency_context() as context:
+            profiler = context.enable_profiling()
+            context.disable_profiling()
+            dependency(Thing)
+        expect(profiler.report()["resolutions"]).to(equal(0))
+
+    def test_report_complains_if_not_enabled(self):
+        with dependency_context() as context:
+            expect(context.resolution_report).to(raise_error(RuntimeError))
+
+
+if "__main__" == __name__:
+    main()
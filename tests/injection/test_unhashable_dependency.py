@@ -21,6 +21,22 @@ class TestUnhashableDependency(TestCase):
             dep.append("spam")
             expect(dependency(dep)).to(be(thing))
 
+    def test_can_replace_unhashable_twice(self):
+        with dependency_context() as context:
+            dep = ["spam"]
+            second = object()
+            context.inject(dep, object())
+            context.inject(dep, second)
+            expect(dependency(dep)).to(be(second))
+
+    def test_unhashable_does_not_hide_hashable(self):
+        with dependency_context() as context:
+            hashable = "eggs"
+            fake_hashable = object()
+            context.inject(["spam"], object())
+            context.inject(hashable, fake_hashable)
+            expect(dependency(hashable)).to(be(fake_hashable))
+
 
 if "__main__" == __name__:
     main()
@@ -0,0 +1,130 @@
+import gc
+from threading import Event, Thread
+from unittest import TestCase, main
+
+from expects import expect, be_false, be_none, equal
+
+from twin_sister import close_all_dependency_contexts, dependency, open_dependency_context
+from twin_sister.fakes import MutableObject
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+class TestCloseWithOwner(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def test_closes_when_owner_collected(self):
+        owner = MutableObject()
+        context = open_dependency_context(owner=owner)
+        context.inject("spam", "eggs")
+        del owner
+        gc.collect()
+        expect(dependency("spam")).to(equal("spam"))
+        expect(DependencyRegistry.current_context()).to(be_none)
+
+    def test_stays_open_while_owner_lives(self):
+        owner = MutableObject()
+        context = open_dependency_context(owner=owner)
+        try:
+            context.inject("spam", "eggs")
+            gc.collect()
+            expect(dependency("spam")).to(equal("eggs"))
+        finally:
+            context.close()
+
+    def test_closes_in_registering_thread_even_if_collected_elsewhere(self):
+        owner = MutableObject()
+        open_dependency_context(owner=owner)
+        holder = [owner]
+        del owner
+
+        def collect():
+            holder.clear()
+            gc.collect()
+
+        t = Thread(target=collect)
+        t.start()
+        t.join()
+        expect(DependencyRegistry.stats()["registrations"]).to(equal(0))
+
+    def test_collecting_owner_while_locks_are_held_does_not_deadlock(self):
+        owner = MutableObject()
+        owner.cycle = owner  # only the cyclic collector can free it
+        context = open_dependency_context(owner=owner)
+        del owner
+
+        def collect_while_holding_locks():
+            with context._lock, DependencyRegistry._lock:
+                gc.collect()
+
+        t = Thread(target=collect_while_holding_locks, daemon=True)
+        t.start()
+        t.join(timeout=5)
+        expect(t.is_alive()).to(be_false)
+        expect(DependencyRegistry.current_context()).to(be_none)
+
+    def test_collection_during_injection_does_not_deadlock(self):
+        def inject_under_gc_pressure():
+            thresholds = gc.get_threshold()
+            gc.set_threshold(1, 1, 1)
+            try:
+                for _ in range(200):
+                    owner = MutableObject()
+                    owner.cycle = owner
+                    context = open_dependency_context(owner=owner)
+                    del owner
+                    for n in range(5):
+                        context.inject(n, n)
+            finally:
+                gc.set_threshold(*thresholds)
+
+        t = Thread(target=inject_under_gc_pressure, daemon=True)
+        t.start()
+        t.join(timeout=30)
+        expect(t.is_alive()).to(be_false)
+
+    def test_explicit_close_releases_owner_finalizer(self):
+        owner = MutableObject()
+        context = open_dependency_context(owner=owner)
+        context.close()
+        expect(context._finalizers).to(equal([]))
+
+
+class TestWeakThreadAttachment(TestCase):
+    def setUp(self):
+        close_all_dependency_contexts()
+
+    def tearDown(self):
+        close_all_dependency_contexts()
+
+    def test_detaches_when_thread_object_collected(self):
+        finish = Event()
+        t = Thread(target=finish.wait)
+        t.start()
+        context = open_dependency_context()
+        context.attach_to_thread(t, weak=True)
+        thread_id = t.ident
+        finish.set()
+        t.join()
+        del t
+        gc.collect()
+        expect([tid for c, tid in DependencyRegistry.registrations() if tid == thread_id]).to(equal([]))
+        expect(context._attached_threads).to(equal([]))
+
+    def test_strong_attachment_survives_thread_object(self):
+        finish = Event()
+        t = Thread(target=finish.wait, daemon=True)
+        t.start()
+        try:
+            context = open_dependency_context()
+            context.attach_to_thread(t)
+            thread_id = t.ident
+            del t
+            gc.collect()
+            expect(context._attached_threads).to(equal([thread_id]))
+        finally:
+            finish.set()
+
+
+if "__main__" == __name__:
+    main()
@@ -1,15 +1,31 @@
+from .injection.context_executor import ContextThreadPoolExecutor
+from .injection.context_snapshot import install_snapshot
+from .injection.fake_fs_image import FakeFsImage
 from .injection.independent_time_controller import IndependentTimeController as TimeController
+from .injection.inject_decorator import inject
+from .injection.injection_set import InjectionSet
 from .convenience_functions import (
+    async_dependency_context,
     close_all_dependency_contexts,
     dependency,
     dependency_context,
     open_dependency_context,
+    open_task_dependency_context,
+    register_service,
 )
 
 # List of symbols intentionally exposed by the module.
 # This suppresses linter warnings about unused imports.
+ContextThreadPoolExecutor
+FakeFsImage
+InjectionSet
 TimeController
+async_dependency_context
 close_all_dependency_contexts
 dependency
 dependency_context
+inject
+install_snapshot
 open_dependency_context
+open_task_dependency_context
+register_service
@@ -1,7 +1,27 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
+from .injection.context_pool import ContextPool
 from .injection.dependency_context import DependencyContext
 from .injection.dependency_registry import DependencyRegistry
+from .injection.named_services import NamedServices
+
+# Recycles contexts opened with recycle=True
+context_pool = ContextPool()
+
+
+@asynccontextmanager
+async def async_dependency_context(**kwargs):
+    """
+    Like dependency_context, but the context is visible only to the
+    current asyncio task (and to tasks it creates while the context is open)
+
+    kwargs get passed to DependencyContext initializer
+    """
+    context = open_task_dependency_context(**kwargs)
+    try:
+        yield context
+    finally:
+        context.close()
 
 
 def close_all_dependency_contexts():
@@ -9,12 +29,33 @@ def close_all_dependency_contexts():
 
 
 def dependency(dep):
+    if not DependencyRegistry.registration_count:
+        # Nothing is registered anywhere (as in production)
+        return dep
     context = DependencyRegistry.current_context()
     if context:
         return context.get(dep)
     return dep
 
 
+def named_dependency(name):
+    """
+    Return the service injected under a name
+    or the real implementation registered with register_service
+    """
+    if DependencyRegistry.registration_count:
+        context = DependencyRegistry.current_context()
+        if context:
+            key = NamedServices.key(name)
+            injected = context.get(key)
+            if injected is not key:
+                return injected
+    return NamedServices.load(name)
+
+
+dependency.named = named_dependency
+
+
 @contextmanager
 def dependency_context(**kwargs):
     """
@@ -25,10 +66,37 @@ def dependency_context(**kwargs):
     context.close()
 
 
-def open_dependency_context(**kwargs):
+def register_service(name, import_path):
     """
+    Register the real implementation of a named service without importing it
+
+    name -- (str) Code requests the service with dependency.named(name)
+    import_path -- (str) "package.module" or "package.module:attribute"
+    """
+    NamedServices.register(name, import_path)
+
+
+def open_dependency_context(*, owner=None, recycle=False, **kwargs):
+    """
+    owner -- Close the context automatically when this object
+      is garbage-collected
+    recycle -- (bool) Reuse a closed context from the pool if one is
+      available.  The context returns to the pool when closed.
+    Other kwargs get passed to DependencyContext initializer
+    """
+    context = context_pool.acquire(**kwargs) if recycle else DependencyContext(**kwargs)
+    DependencyRegistry.register(context)
+    if owner is not None:
+        context.close_with(owner)
+    return context
+
+
+def open_task_dependency_context(**kwargs):
+    """
+    Open a context that is visible only to the current asyncio task
+
     kwargs get passed to DependencyContext initializer
     """
     context = DependencyContext(**kwargs)
-    DependencyRegistry.register(context)
+    DependencyRegistry.register_with_task(context)
     return context
@@ -8,3 +8,7 @@ class FunctionNotCalled(AssertionError):
 
 class KwargNotSpecified(AssertionError):
     pass
+
+
+class FrozenContextError(RuntimeError):
+    pass
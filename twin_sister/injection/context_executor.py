@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+def call_in_context(context, call):
+    """
+    Call a function (with no arguments) with the context registered
+    for the current thread
+    """
+    DependencyRegistry.register(context)
+    try:
+        return call()
+    finally:
+        DependencyRegistry.unregister(context)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Behaves exactly like ThreadPoolExecutor except that each task runs in
+    the dependency context that was current when the task was submitted.
+    """
+
+    def submit(self, *args, **kwargs):
+        # fn is unpacked by hand, so the caller can pass a keyword argument
+        # named fn (Python 3.7 has no positional-only parameters)
+        if not args:
+            raise TypeError("submit expected a callable to run")
+        fn, *args = args
+        context = DependencyRegistry.current_context()
+        if context is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(call_in_context, context, partial(fn, *args, **kwargs))
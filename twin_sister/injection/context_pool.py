@@ -0,0 +1,54 @@
+from threading import Lock
+
+from twin_sister.injection.dependency_context import DependencyContext
+from twin_sister.injection.leak_detector import capture_creation_stack
+
+
+class ContextPool:
+    """
+    Recycles dependency contexts so that their fakes (notably the fake
+    filesystem) need not be built again for every test.
+
+    A context acquired from the pool returns to it, reset, when closed.
+    Do not use a context after closing it because the pool may already
+    have handed it to someone else.
+    """
+
+    def __init__(self):
+        self._idle = {}  # initializer kwargs -> list of idle contexts
+        self._lock = Lock()
+
+    def acquire(self, **kwargs):
+        """
+        Return an idle context (or a new one if none is idle).
+        The caller is responsible for registering it.
+
+        kwargs get passed to DependencyContext initializer.
+        Contexts with a parent are never recycled.
+        """
+        if kwargs.get("parent"):
+            return DependencyContext(**kwargs)
+        key = tuple(sorted(kwargs.items()))
+        with self._lock:
+            idle = self._idle.get(key)
+            context = idle.pop() if idle else None
+        if context is None:
+            context = DependencyContext(**kwargs)
+            context._pool_key = key
+        else:
+            # A leak is the fault of whoever has the context now
+            context.creation_stack = capture_creation_stack()
+        context._pool = self
+        return context
+
+    def release(self, context):
+        """
+        Reset a context and make it available again
+        """
+        context.reset()
+        with self._lock:
+            self._idle.setdefault(context._pool_key, []).append(context)
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
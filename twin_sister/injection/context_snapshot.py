@@ -0,0 +1,77 @@
+import importlib
+from types import ModuleType
+
+from twin_sister.injection.dependency_registry import DependencyRegistry
+
+
+class ModuleReference:
+    """
+    Picklable stand-in for a module (modules themselves cannot be pickled)
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def load(self):
+        return importlib.import_module(self.name)
+
+
+def _encode(obj):
+    if isinstance(obj, ModuleType):
+        return ModuleReference(obj.__name__)
+    return obj
+
+
+def _decode(obj):
+    if isinstance(obj, ModuleReference):
+        return obj.load()
+    return obj
+
+
+class ContextSnapshot:
+    """
+    Picklable copy of a DependencyContext, flattened to include everything
+    inherited from its ancestors.  Create one with DependencyContext.snapshot.
+
+    Pickle handles classes and functions by their importable names, so
+    injections keyed by them resolve to the same objects in another process.
+    Modules get the same treatment.  Injected objects must be picklable.
+    """
+
+    def __init__(self, *, injections, environ=None, supply_fs=False, supply_logging=False):
+        self.injections = [(_encode(k), _encode(v)) for k, v in injections]
+        self.environ = environ
+        self.supply_fs = supply_fs
+        self.supply_logging = supply_logging
+
+    def restore(self):
+        """
+        Return a new DependencyContext equivalent to the original.
+        The caller is responsible for registering it.
+        """
+        # Import here to avoid a circular import
+        from twin_sister.injection.dependency_context import DependencyContext
+
+        context = DependencyContext(
+            supply_env=self.environ is not None, supply_fs=self.supply_fs, supply_logging=self.supply_logging
+        )
+        if self.environ:
+            context.set_env(**self.environ)
+        context.inject_many((_decode(k), _decode(v)) for k, v in self.injections)
+        return context
+
+
+def install_snapshot(snapshot):
+    """
+    Make a snapshot the current context of a worker process.
+    Intended as a process pool initializer:
+
+    ProcessPoolExecutor(initializer=install_snapshot, initargs=(context.snapshot(),))
+
+    A worker started by fork inherits a copy of the parent's registry,
+    so the registry is reset before the snapshot is installed.
+    """
+    DependencyRegistry.reset()
+    context = snapshot.restore()
+    DependencyRegistry.register(context)
+    return context
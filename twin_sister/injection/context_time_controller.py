@@ -25,6 +25,8 @@ class ContextTimeController(Thread):
         self.value_returned = None
         self.fake_datetime = FakeDatetime()
         self._context = parent_context.spawn()
+        self._context.inject(datetime, self.fake_datetime)
+        self._context.attach_when_started(self)
         self._target = target
 
     """Advance the fake clock by the given interval
@@ -39,8 +41,6 @@ class ContextTimeController(Thread):
         self.fake_datetime.advance(**kwargs)
 
     def run(self):
-        self._context.inject(datetime, self.fake_datetime)
-        self._context.attach_to_thread(self)
         try:
             self.value_returned = self._target()
         except Exception as e:
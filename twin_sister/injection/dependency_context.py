@@ -1,19 +1,39 @@
+from collections.abc import Mapping
 import logging
 import os
+from threading import Lock, get_ident as get_thread_id
+from time import perf_counter
+from weakref import finalize
 
+from twin_sister.injection.context_snapshot import ContextSnapshot
 from twin_sister.injection.context_time_controller import ContextTimeController
 from twin_sister.injection.dependency_registry import DependencyRegistry
 import twin_sister.injection.fake_fs as fake_fs
+import twin_sister.injection.fake_fs_archive as fake_fs_archive
+from twin_sister.injection.fake_fs_image import FakeFsImage
 from twin_sister.injection.fake_logging import FakeLogging
 from twin_sister.injection.fake_singleton import FakeSingleton
+from twin_sister.injection.frozen_context import FrozenContext
+from twin_sister.injection.fs_stats import FsStats
+from twin_sister.injection.generation import Generation
+from twin_sister.injection.injection_set import injection_pairs
+from twin_sister.injection.lazy_factory import LazyFactory
+from twin_sister.injection.named_services import NamedServices
+from twin_sister.injection.leak_detector import capture_creation_stack
 from twin_sister.injection.passthrough import Passthrough
+from twin_sister.injection.resolution_profiler import ResolutionProfiler
 from twin_sister.injection.singleton_class import SingletonClass
 
+# Marks a dependency that has not been injected into a particular context
+NOT_INJECTED = object()
+
 
 class DependencyContext:
     def __init__(self, *, parent=None, supply_env=False, supply_fs=False, supply_logging=False):
         """
         parent -- Inherit dependencies injected into this context
+        supply_fs -- (bool or FakeFsImage) Supply a fake filesystem,
+          empty or with a copy of the image
         """
         if parent and (supply_env or supply_fs or supply_logging):
             raise ValueError(
@@ -21,63 +41,415 @@ class DependencyContext:
                 "if a parent context exists.  "
                 "We inherit fakes from the parent."
             )
+        if isinstance(parent, FrozenContext):
+            raise ValueError("A frozen context cannot be a parent.  Spawn from the context that was frozen instead.")
+        # Where the context was created (see LeakDetector)
+        self.creation_stack = capture_creation_stack()
         self._attached_threads = []
-        self._injected = []  # key/value tuples
+        self._threads_to_attach = []  # not started yet
+        self._finalizers = []  # weakref.finalize objects (see close_with)
+        self._lock = Lock()
+        # Published injections:  a dict of hashable dependency -> injected
+        # object and a tuple of key/value tuples for unhashable dependencies.
+        # Never modified in place.  See _publish.
+        self._injections = ({}, ())
+        self._resolved = (None, {})  # generation, dependency -> resolution
+        self._inject_cache = {}  # key -> (generation, resolutions).  See inject.
+        self._supplied = {}  # dependency -> built-in fake supplied by the context
         self._parent = parent
-        self.fs = None
+        self._pool = None  # ContextPool that recycles this context
+        self._pool_key = None  # how the ContextPool files this context
+        self._profiler = None
+        self._supplies_env = supply_env
+        self._filesystem = None  # LazyFilesystem
         self.logging = parent.logging if parent else None
         self.os = parent.os if parent else Passthrough(os)
         if supply_logging:
             self._supply_logging()
-        if supply_fs:
+        if isinstance(supply_fs, FakeFsImage):
+            self._supply_fs(supply_fs.lazy_filesystem())
+        elif supply_fs:
             self._supply_fs()
         if supply_env:
             self._supply_env()
-        self.inject(os, self.os)
+        self._supply(os, self.os)
+
+    def _supply(self, dependency, fake):
+        self._supplied[dependency] = fake
+        self.inject(dependency, fake)
 
-    def _supply_fs(self):
-        self.fs = fake_fs.create_fs()
-        self.os = fake_fs.create_os(self.fs)
-        self.inject(os.path, self.os.path)
-        self.inject(open, fake_fs.create_open(self.fs))
+    @property
+    def fs(self):
+        """
+        The fake filesystem (if supplied).
+        Using it builds the filesystem if nothing has yet.
+        """
+        return self._filesystem.fs if self._filesystem else None
+
+    def _supply_fs(self, filesystem=None):
+        # Nothing gets built until something first uses the fake os, os.path,
+        # open, or fs.  Setting a fake environ on self.os does not count.
+        if filesystem is None:
+            filesystem = fake_fs.LazyFilesystem()
+        self._filesystem = filesystem
+        self.os = fake_fs.LazyOs(filesystem)
+        self._supply_fs_functions()
+
+    def _supply_fs_functions(self):
+        # The factories hold on to what they build, so supply new ones
+        # whenever the filesystem changes what it provides (reset, I/O
+        # counting).  Anything injected over the old ones stays.
+        filesystem = self._filesystem
+        injected, _ = self._injections
+        for dependency, factory in (
+            (os.path, LazyFactory(lambda: filesystem.os.path)),
+            (open, LazyFactory(lambda: filesystem.open)),
+        ):
+            current = injected.get(dependency, NOT_INJECTED)
+            if current is NOT_INJECTED or current is self._supplied.get(dependency):
+                self._supply(dependency, factory)
+            else:
+                self._supplied[dependency] = factory
 
     def _supply_env(self):
         self.os.environ = {}
 
     def _supply_logging(self):
         self.logging = FakeLogging()
-        self.inject(logging, self.logging)
+        self._supply(logging, self.logging)
 
-    def attach_to_thread(self, thread_object):
+    def attach_to_thread(self, thread_object, *, weak=False):
         """
         Attach this context to a thread.
         After attachment, calls to "dependency" inside the thread
           will use this context.
 
         thread_object -- (Thread) Attach to this thread
+        weak -- (bool) Detach automatically when the Thread object is
+          garbage-collected.  (The registry forgets dead threads anyway.)
         """
         thread_id = thread_object.ident
         if not thread_id:
             raise RuntimeError("A running thread is required.")
-        DependencyRegistry.register(context=self, thread_id=thread_id)
-        self._attached_threads.append(thread_id)
+        with self._lock:
+            DependencyRegistry.register(context=self, thread_id=thread_id)
+            self._attached_threads.append(thread_id)
+            if weak:
+                self._finalizers.append(finalize(thread_object, DependencyRegistry.defer, self._detach, thread_id))
+
+    def _detach(self, thread_id):
+        with self._lock:
+            if thread_id in self._attached_threads:
+                self._attached_threads.remove(thread_id)
+                DependencyRegistry.unregister(self, thread_id=thread_id)
+
+    def close_with(self, owner):
+        """
+        Close this context automatically when owner is garbage-collected.
+        The context gets unregistered from the thread that calls close_with
+        (and from any threads it is attached to).
+
+        owner -- any object that supports weak references
+        """
+        # The garbage collector can run the finalizer while this thread holds
+        # one of the locks that _close needs, so the registry closes the
+        # context later.
+        self._finalizers.append(finalize(owner, DependencyRegistry.defer, self._close, get_thread_id()))
+
+    def attach_when_started(self, thread_object):
+        """
+        Attach this context to a thread that has not started yet.
+        The thread registers the context itself before it calls its
+        target, so the target cannot miss the context.
+        The attachment ends when the thread's run method returns
+        (or when the context is closed).
+
+        thread_object -- (Thread) Attach to this thread
+        """
+        if thread_object.ident:
+            raise RuntimeError("The thread has already started.  Use attach_to_thread instead.")
+        run = thread_object.run
+
+        def run_attached():
+            thread_id = get_thread_id()
+            with self._lock:
+                attach = thread_object in self._threads_to_attach
+                if attach:
+                    self._threads_to_attach.remove(thread_object)
+                    DependencyRegistry.register(context=self, thread_id=thread_id)
+                    self._attached_threads.append(thread_id)
+            try:
+                return run()
+            finally:
+                if attach:
+                    self._detach(thread_id)
+
+        with self._lock:
+            self._threads_to_attach.append(thread_object)
+        # Thread.start calls run from inside the new thread
+        thread_object.run = run_attached
 
     def close(self):
-        for t in self._attached_threads:
-            DependencyRegistry.unregister(self, thread_id=t)
-        DependencyRegistry.unregister(self)
+        self._close(get_thread_id())
+
+    def _close(self, thread_id):
+        with self._lock:
+            for t in self._attached_threads:
+                DependencyRegistry.unregister(self, thread_id=t)
+            self._attached_threads = []
+            self._threads_to_attach = []
+            finalizers, self._finalizers = self._finalizers, []
+        for f in finalizers:
+            f.detach()
+        DependencyRegistry.unregister(self, thread_id=thread_id)
+        DependencyRegistry.unregister_from_task(self)
+        pool, self._pool = self._pool, None
+        if pool:
+            pool.release(self)
+
+    def reset(self):
+        """
+        Return the context to the state it was in when it was created.
+        Remove everything injected, empty the fake filesystem, discard
+        fake log records, and clear the fake environment.
+        Fakes inherited from a parent context are left alone.
+        """
+        if self._filesystem:
+            self._filesystem.reset()
+            self._supply_fs_functions()
+        if logging in self._supplied:
+            self.logging.reset()
+        if self._supplies_env:
+            self._supply_env()
+        self._profiler = None
+        self._inject_cache = {}
+        with self._lock:
+            self._injections = (dict(self._supplied), ())
+        Generation.advance()
+
+    def _find(self, dependency):
+        """
+        Return the object injected into this context (ignoring the parent)
+        or NOT_INJECTED
+        """
+        injected, unhashable_injected = self._injections
+        try:
+            return injected.get(dependency, NOT_INJECTED)
+        except TypeError:
+            # Unhashable dependencies get compared one at a time
+            for k, v in unhashable_injected:
+                if k == dependency:
+                    return v
+            return NOT_INJECTED
+
+    def _resolve(self, dependency):
+        """
+        Search this context and its ancestors.
+        Return the injected object or NOT_INJECTED
+        """
+        injected = self._find(dependency)
+        if injected is NOT_INJECTED and self._parent:
+            return self._parent._resolve_cached(dependency)
+        return injected
+
+    def _resolve_cached(self, dependency):
+        generation = Generation.current
+        resolved_generation, resolved = self._resolved
+        if resolved_generation != generation:
+            # Something was injected somewhere, so start over
+            resolved = {}
+            self._resolved = (generation, resolved)
+        try:
+            return resolved[dependency]
+        except KeyError:
+            injected = self._resolve(dependency)
+            resolved[dependency] = injected
+            return injected
+        except TypeError:
+            return self._resolve(dependency)
+
+    def _level_of(self, dependency):
+        """
+        Return the number of generations between this context and the one
+        where the dependency is injected or None if it is not injected
+        """
+        context = self
+        level = 0
+        while context:
+            if context._find(dependency) is not NOT_INJECTED:
+                return level
+            context = context._parent
+            level += 1
+        return None
+
+    def _get_profiled(self, dependency):
+        started = perf_counter()
+        resolved = self._get(dependency)
+        elapsed = perf_counter() - started
+        self._profiler.record(dependency, self._level_of(dependency), elapsed)
+        return resolved
 
     def get(self, dependency):
-        for k, v in self._injected:
-            if k == dependency:
-                return v
-        if self._parent:
-            return self._parent.get(dependency)
-        return dependency
+        if self._profiler:
+            return self._get_profiled(dependency)
+        return self._get(dependency)
+
+    def _get(self, dependency):
+        injected = self.lookup(dependency)
+        # Not isinstance, which consults __class__.  A LazyOs would build
+        # its filesystem to answer.
+        if type(injected) is LazyFactory:
+            return injected.resolve()
+        return injected
+
+    def lookup(self, dependency):
+        """
+        Like get, but return a LazyFactory as is rather than resolving it
+        """
+        injected = self._resolve_cached(dependency)
+        if injected is NOT_INJECTED:
+            return dependency
+        return injected
+
+    def _lookup_many(self, key, dependencies):
+        """
+        Return a dict of name -> lookup(dependency) for a dict of
+        name -> dependency.  The result is cached under key until anything
+        gets injected anywhere (see inject_decorator).
+        """
+        if self._profiler:
+            # Let the profiler see every resolution
+            return {name: self.get(dependency) for name, dependency in dependencies.items()}
+        generation = Generation.current
+        cached_generation, resolutions = self._inject_cache.get(key, (None, None))
+        if cached_generation != generation:
+            resolutions = {name: self.lookup(dependency) for name, dependency in dependencies.items()}
+            self._inject_cache[key] = (generation, resolutions)
+        return resolutions
+
+    def _publish(self, injections):
+        """
+        Apply (dependency, injected) pairs with copy-on-write semantics.
+
+        Writers are serialized, so concurrent injections are never lost.
+        Each batch is applied to private copies which are then published
+        by a single reference assignment.  A reader therefore sees all of
+        a batch or none of it and never a half-built mapping.  Once a
+        thread has returned from inject, every later lookup in any thread
+        sees the injection.
+        """
+        with self._lock:
+            injected, unhashable_injected = self._injections
+            injected = dict(injected)
+            unhashable_injected = list(unhashable_injected)
+            for dependency, value in injections:
+                try:
+                    injected[dependency] = value
+                except TypeError:
+                    unhashable_injected = [(k, v) for k, v in unhashable_injected if k != dependency]
+                    unhashable_injected.append((dependency, value))
+            self._injections = (injected, tuple(unhashable_injected))
+        Generation.advance()
 
     def inject(self, dependency, injected):
-        self._injected = [(k, v) for k, v in self._injected if k != dependency]
-        self._injected.append((dependency, injected))
+        self._publish(((dependency, injected),))
+
+    def enable_profiling(self, *, sample_every=100):
+        """
+        Start measuring resolutions made through this context and return
+        the ResolutionProfiler that does the measuring.
+
+        sample_every -- record the call site of every nth resolution
+          (0 disables sampling)
+        """
+        self._profiler = ResolutionProfiler(sample_every=sample_every)
+        return self._profiler
+
+    def disable_profiling(self):
+        self._profiler = None
+
+    def resolution_report(self):
+        """
+        Return a dict that summarizes resolution measurements
+        (see ResolutionProfiler.report)
+        """
+        if not self._profiler:
+            raise RuntimeError("Profiling is not enabled.  Call enable_profiling first.")
+        return self._profiler.report()
+
+    def _filesystem_owner(self):
+        for context in self._lineage():
+            if context._filesystem:
+                return context
+        raise RuntimeError("There is no fake filesystem.  Specify supply_fs=True when creating the context.")
+
+    def _own_fs_functions(self):
+        """
+        Return (os, open) for the fake filesystem itself, unaffected by
+        anything injected over them and by I/O counting.
+        Without a fake filesystem, return the context's os and the real open.
+        """
+        for context in self._lineage():
+            if context._filesystem:
+                _, os_module, open_function = context._filesystem.build()
+                return os_module, open_function
+        return self.os, open
+
+    def enable_fs_stats(self):
+        """
+        Start counting I/O done through the fake filesystem and return the
+        FsStats that does the counting.  Counting starts from zero, so
+        enable it after creating any files the test needs.
+        The filesystem may be inherited from a parent context, in which
+        case everything that uses it gets counted.
+        """
+        owner = self._filesystem_owner()
+        stats = FsStats()
+        owner._filesystem.count_io(stats)
+        owner._supply_fs_functions()
+        return stats
+
+    def disable_fs_stats(self):
+        owner = self._filesystem_owner()
+        owner._filesystem.count_io(None)
+        owner._supply_fs_functions()
+
+    def fs_stats(self):
+        """
+        Return a dict that summarizes I/O done through the fake filesystem
+        (see FsStats.report)
+        """
+        stats = self._filesystem_owner()._filesystem.stats
+        if not stats:
+            raise RuntimeError("I/O accounting is not enabled.  Call enable_fs_stats first.")
+        return stats.report()
+
+    def inject_named(self, name, injected):
+        """
+        Inject a replacement for a named service (see dependency.named)
+        """
+        self.inject(NamedServices.key(name), injected)
+
+    def inject_factory(self, dependency, factory, *, scope="context"):
+        """
+        Inject an object that gets built when it is first requested.
+        Dependencies that are never requested cost nothing to inject.
+
+        dependency -- the real object
+        factory -- (callable) Returns the injected object.  Takes no arguments.
+        scope -- (str) How widely each built object is shared:
+          "context" (the default), "thread", or "task" (asyncio)
+        """
+        self.inject(dependency, LazyFactory(factory, scope))
+
+    def inject_many(self, injections):
+        """
+        Inject a batch of dependencies in one pass.
+
+        injections -- a mapping of dependency to injected object,
+          an InjectionSet, or an iterable of (dependency, injected) tuples
+        """
+        self._publish(injection_pairs(injections))
 
     def inject_as_class(self, dependency, injected):
         """
@@ -95,6 +467,18 @@ class DependencyContext:
         """
         self.inject(dependency, FakeSingleton(injected))
 
+    def inject_many_as_class(self, injections):
+        """
+        Like inject_as_class, but for a batch (see inject_many)
+        """
+        self.inject_many((k, SingletonClass(v)) for k, v in injection_pairs(injections))
+
+    def inject_many_as_singleton(self, injections):
+        """
+        Like inject_as_singleton, but for a batch (see inject_many)
+        """
+        self.inject_many((k, FakeSingleton(v)) for k, v in injection_pairs(injections))
+
     def create_file(self, filename, *, content=None, text=None):
         """
         Create a file in the fake filesystem
@@ -104,14 +488,48 @@ class DependencyContext:
         """
         if content and text:
             raise TypeError("Content and text cannot both be specified")
-        path, _ = self.os.path.split(filename)
-        if path:
-            self.os.makedirs(path, exist_ok=True)
-        fd = self.os.open(filename, self.os.O_CREAT | self.os.O_WRONLY)
-        if content or text:
-            bytes_out = content or bytes(text, encoding="utf-8")
-            self.os.write(fd, bytes_out)
-        self.os.close(fd)
+        self.create_files([(filename, content or text)])
+
+    def create_files(self, files):
+        """
+        Create files in the fake filesystem.
+        Each missing directory gets created once, however many files it holds.
+
+        files -- a mapping of filename to content or an iterable of
+          (filename, content) tuples.  Content can be bytes, str, None
+          (for an empty file), or an iterable of bytes or str chunks.
+          Chunks are written as they arrive, so a generator can supply a
+          large file without ever holding all of it.
+        """
+        pairs = files.items() if isinstance(files, Mapping) else files
+        fake_fs.write_files(*self._own_fs_functions(), pairs)
+
+    def export_fs(self, path_or_fileobj, *, root="/", compression=""):
+        """
+        Write the fake filesystem to a tar archive, one chunk at a time
+
+        path_or_fileobj -- (str or binary file object) Where to write the
+          archive.  A path refers to the real filesystem.
+        root -- (str) Export only this fake directory
+        compression -- "", "gz", "bz2", or "xz"
+        """
+        fake_fs_archive.export_tarball(*self._own_fs_functions(), path_or_fileobj, root=root, compression=compression)
+
+    def import_fs(self, source, *, target=None):
+        """
+        Copy a real directory or the contents of a tar archive into the
+        fake filesystem.  The source is read once, a chunk at a time.
+
+        source -- (str or binary file object) Path to a real directory,
+          path to a tar archive, or an open tar archive
+        target -- (str) Fake directory where the contents go.
+          Default: the same path for a directory, the root for an archive
+        """
+        if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+            entries = fake_fs_archive.read_directory(source, target=target or os.path.abspath(source))
+        else:
+            entries = fake_fs_archive.read_tarball(source, target=target or "/")
+        fake_fs_archive.load(*self._own_fs_functions(), entries)
 
     def _assert_fake_env(self):
         if self.os.environ is os.environ:
@@ -144,6 +562,97 @@ class DependencyContext:
         """
         return ContextTimeController(daemon=daemon, target=target, parent_context=self)
 
+    def _lineage(self):
+        """
+        Return a list of this context followed by its ancestors
+        """
+        lineage = [self]
+        while lineage[-1]._parent:
+            lineage.append(lineage[-1]._parent)
+        return lineage
+
+    def freeze(self):
+        """
+        Return a FrozenContext:  an immutable copy of this context,
+        flattened to include everything inherited from its ancestors.
+        Threads can share it safely.  Later injections into this context
+        do not affect it.
+        """
+        injected = {}
+        unhashable_injected = []
+        for context in reversed(self._lineage()):
+            context_injected, context_unhashable_injected = context._injections
+            injected.update(context_injected)
+            unhashable_injected = [
+                (k, v)
+                for k, v in unhashable_injected
+                if not any(k == overriding for overriding, _ in context_unhashable_injected)
+            ]
+            unhashable_injected += context_unhashable_injected
+        return FrozenContext(
+            injected=injected, unhashable_injected=unhashable_injected, os=self.os, logging=self.logging
+        )
+
+    def snapshot(self):
+        """
+        Return a picklable ContextSnapshot of this context and its ancestors.
+        The snapshot can recreate the context in another process.
+
+        Fakes supplied by the context (environment, filesystem, logging) are
+        recreated from scratch except for environment variables.
+        Files in the fake filesystem do not survive the trip.
+        """
+        lineage = self._lineage()
+        root = lineage[-1]
+        injections = []
+        for context in reversed(lineage):
+            injected, unhashable_injected = context._injections
+            injections += [(k, v) for k, v in injected.items() if context._supplied.get(k, NOT_INJECTED) is not v]
+            injections += unhashable_injected
+        supply_env = root.os.environ is not os.environ
+        return ContextSnapshot(
+            injections=injections,
+            environ=dict(root.os.environ) if supply_env else None,
+            supply_fs=root._filesystem is not None,
+            supply_logging=root.logging is not None,
+        )
+
+    def fork(self):
+        """
+        Return a copy of this context with the same parent, injections,
+        fake environment, and fake filesystem.  Changes to one do not
+        affect the other.
+
+        Forking is cheap:
+          - Injections are shared until either context changes them.
+          - The fork gets its own copy of the fake environment.
+          - The fake filesystem's tree is copied, but not file contents
+            (see LazyFilesystem.fork).
+          - The fork gets fresh fake logging with no records.
+        """
+        forked = self.__class__(parent=self._parent)
+        if self._parent is None:
+            if logging in self._supplied:
+                forked._supply_logging()
+            if self._filesystem:
+                forked._supply_fs(self._filesystem.fork())
+            forked._supplies_env = self._supplies_env
+            if self._supplies_env:
+                forked.os.environ = dict(self.os.environ)
+            forked._supply(os, forked.os)
+        with self._lock:
+            forked._injections = injections = self._injections
+        injected, _ = injections
+        # Swap in the fork's own fakes, but only where the original still
+        # has its own.  Anything injected over them carries over.
+        forked._publish(
+            (dependency, fake)
+            for dependency, fake in forked._supplied.items()
+            if injected.get(dependency, NOT_INJECTED) is NOT_INJECTED
+            or injected[dependency] is self._supplied.get(dependency)
+        )
+        return forked
+
     def spawn(self):
         """
         Return a DependencyContext that is a child of this one
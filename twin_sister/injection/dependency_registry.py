@@ -1,39 +1,209 @@
-from threading import get_ident as get_thread_id
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from itertools import count
+import os
+from threading import Lock, current_thread, enumerate as enumerate_threads, get_ident as get_thread_id
 
 
 class DependencyRegistry:
+    # Stack of (order, DependencyContext) tuples registered by the current
+    # asyncio task.  Each task runs in its own copy of the contextvars
+    # context, so concurrent tasks cannot see one another's registrations.
+    _task_stack = ContextVar("twin_sister_task_stack", default=())
+    _lock = Lock()
+    # A process created by fork starts with an empty registry.
+    # Set this to True to keep the forking thread's current context
+    # (registered for the child's only thread).
+    carry_context_across_fork = False
+    _carried_across_fork = None
+
     @classmethod
     def current_context(cls):
-        thread_id = get_thread_id()
-        if thread_id in cls._context_stacks:
-            stack = cls._context_stacks[thread_id]
-            if stack:
-                return stack[-1]
+        if cls._deferred:
+            cls._run_deferred()
+        # Whichever was registered most recently wins, whether for the
+        # task or for the thread
+        task_stack = cls._task_stack.get()
+        thread_stack = cls._context_stacks.get(get_thread_id())
+        if task_stack and not (thread_stack and thread_stack[-1][0] > task_stack[-1][0]):
+            return task_stack[-1][1]
+        if thread_stack:
+            return thread_stack[-1][1]
         return None
 
+    @classmethod
+    def defer(cls, fn, *args):
+        """
+        Call fn(*args) the next time anyone asks the registry which
+        contexts are registered.  Garbage-collection callbacks use this
+        because they can run while their thread holds any lock, including
+        the ones that fn would need.  Appending to a deque takes no lock.
+        """
+        cls._deferred.append((fn, args))
+
+    @classmethod
+    def _run_deferred(cls):
+        while True:
+            try:
+                fn, args = cls._deferred.popleft()
+            except IndexError:
+                return
+            fn(*args)
+
+    @classmethod
+    def _before_fork(cls):
+        cls._carried_across_fork = cls.current_context() if cls.carry_context_across_fork else None
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        # Another thread may have held the lock when the parent forked.
+        # That thread does not exist in the child, so it will never let go.
+        cls._lock = Lock()
+        carried, cls._carried_across_fork = cls._carried_across_fork, None
+        # Thread IDs from the parent are meaningless here and can even
+        # collide with the child's own.
+        cls.reset()
+        if carried:
+            cls.register(carried)
+
+    @classmethod
+    def _after_fork_in_parent(cls):
+        cls._carried_across_fork = None
+
+    @classmethod
+    def _prune_dead_threads(cls):
+        """
+        Discard the stacks of threads that are no longer running.
+        Caller must hold the lock.
+        """
+        live = {t.ident for t in enumerate_threads()}
+        for thread_id in [t for t in cls._context_stacks if t not in live]:
+            cls.registration_count -= len(cls._context_stacks.pop(thread_id))
+
     @classmethod
     def register(cls, context, *, thread_id=None):
         if thread_id is None:
-            thread_id = get_thread_id()
-        if thread_id not in cls._context_stacks:
-            cls._context_stacks[thread_id] = []
-        cls._context_stacks[thread_id].append(context)
+            # current_thread makes even a foreign thread known to threading,
+            # so its stack survives pruning.
+            thread_id = current_thread().ident
+        with cls._lock:
+            if thread_id not in cls._context_stacks:
+                # Thread IDs get reused, so a new stack is the moment to
+                # throw away those left behind by threads that have ended.
+                cls._prune_dead_threads()
+                cls._context_stacks[thread_id] = []
+            cls._context_stacks[thread_id].append((next(cls._order), context))
+            cls.registration_count += 1
+
+    @classmethod
+    def register_with_task(cls, context):
+        """
+        Register a context for the current asyncio task only.
+        It takes precedence over any context registered for the thread
+        before it (but not after it).
+        """
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None  # no event loop
+        with cls._lock:
+            cls._task_stack.set(cls._task_stack.get() + ((next(cls._order), context),))
+            cls.registration_count += 1
+            if task not in cls._task_registrations:
+                cls._task_registrations[task] = []
+                if task is not None:
+                    # The task's registrations vanish with it, closed or not
+                    task.add_done_callback(cls._forget_task)
+            cls._task_registrations[task].append(context)
+
+    @classmethod
+    def _forget_task(cls, task):
+        with cls._lock:
+            cls.registration_count -= len(cls._task_registrations.pop(task, ()))
+
+    @classmethod
+    def registrations(cls):
+        """
+        Return a list of (context, thread_id) tuples, one for each context
+        registered for a thread.  Contexts registered for asyncio tasks
+        are visible only inside their tasks, so they are not included.
+        """
+        cls._run_deferred()
+        with cls._lock:
+            return [(context, thread_id) for thread_id, stack in cls._context_stacks.items() for _, context in stack]
 
     @classmethod
     def reset(cls):
-        # thread_id -> stack of DependencyContext objects
-        cls._context_stacks = {}
+        with cls._lock:
+            cls._deferred = deque()  # (fn, args) -- see defer
+            # Numbers registrations in the order they are made
+            cls._order = count()
+            # thread_id -> stack of (order, DependencyContext) tuples
+            cls._context_stacks = {}
+            cls._task_stack.set(())
+            # task (None outside of tasks) -> contexts it registered
+            # and has not unregistered.  These are what registration_count
+            # counts, because a task's stack is visible only to the task.
+            cls._task_registrations = {}
+            # Number of registrations in every thread and task.
+            # While it is zero, there is nothing for dependency() to look up.
+            cls.registration_count = 0
+
+    @classmethod
+    def stats(cls):
+        """
+        Return a dict describing what the registry holds:
+          thread_stacks -- number of threads with registered contexts
+          contexts -- number of distinct contexts registered for threads
+          registrations -- number of registrations in every thread and task
+        """
+        cls._run_deferred()
+        with cls._lock:
+            cls._prune_dead_threads()
+            stacks = list(cls._context_stacks.values())
+            return {
+                "thread_stacks": len(stacks),
+                "contexts": len({id(context) for stack in stacks for _, context in stack}),
+                "registrations": cls.registration_count,
+            }
 
     @classmethod
     def unregister(cls, context, *, thread_id=None):
         if thread_id is None:
             thread_id = get_thread_id()
+        with cls._lock:
+            try:
+                stack = cls._context_stacks[thread_id]
+                stack.remove(next(entry for entry in stack if entry[1] is context))
+                cls.registration_count -= 1
+                if not stack:
+                    del cls._context_stacks[thread_id]
+            except (KeyError, StopIteration):
+                # Sometimes, cleanup can fail due to a race condition
+                # If it's gone, it's gone.  No need to raise an exception.
+                pass
+
+    @classmethod
+    def unregister_from_task(cls, context):
         try:
-            cls._context_stacks[thread_id].remove(context)
-        except KeyError:
-            # Sometimes, cleanup can fail due to a race condition
-            # If it's gone, it's gone.  No need to raise an exception.
-            pass
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        with cls._lock:
+            task_stack = cls._task_stack.get()
+            if any(c is context for _, c in task_stack):
+                cls._task_stack.set(tuple(entry for entry in task_stack if entry[1] is not context))
+            registered = cls._task_registrations.get(task, [])
+            if context in registered:
+                registered.remove(context)
+                cls.registration_count -= 1
 
 
 DependencyRegistry.reset()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=DependencyRegistry._before_fork,
+        after_in_child=DependencyRegistry._after_fork_in_child,
+        after_in_parent=DependencyRegistry._after_fork_in_parent,
+    )
@@ -1,13 +1,261 @@
-from pyfakefs import fake_filesystem as api
+import sys
+from threading import Lock
+import weakref
+
+from twin_sister.injection import fs_stats
+from twin_sister.injection.passthrough import Passthrough
+
+# pyfakefs is imported when the first fake filesystem gets built,
+# so contexts that never touch a file do not pay for the import.
 
 
 def create_fs():
+    from pyfakefs import fake_filesystem as api
+
     return api.FakeFilesystem()
 
 
 def create_open(fs):
+    from pyfakefs import fake_filesystem as api
+
     return api.FakeFileOpen(fs)
 
 
 def create_os(fs):
+    from pyfakefs import fake_filesystem as api
+
     return api.FakeOsModule(fs)
+
+
+def _copy_entry(entry, fs, parent, copied):
+    """
+    Copy a pyfakefs file or directory (and everything under it) into fs.
+    Contents are immutable bytes, so they get shared rather than copied.
+    copied -- dict of id(original) -> copy, which keeps hard links linked
+    """
+    from pyfakefs.fake_file import FakeDirectory
+
+    if id(entry) in copied:
+        return copied[id(entry)]
+    copy = object.__new__(type(entry))
+    copied[id(entry)] = copy
+    copy.__dict__.update(entry.__dict__)
+    copy._filesystem = weakref.ref(fs)
+    copy.parent_dir = None if parent is None else weakref.ref(parent)
+    copy.stat_result = entry.stat_result.copy()
+    copy.xattr = dict(entry.xattr)
+    if isinstance(entry, FakeDirectory):
+        copy._entries = {name: _copy_entry(child, fs, copy, copied) for name, child in entry._entries.items()}
+    return copy
+
+
+def _can_copy_tree(source):
+    """
+    Does this pyfakefs keep its tree the way _copy_entry expects?
+    (Older releases, for example, refer to the filesystem directly
+    rather than through a weak reference.)
+    """
+    root = vars(source.root)
+    return (
+        isinstance(root.get("_filesystem"), weakref.ref)
+        and "parent_dir" in root
+        and isinstance(root.get("xattr"), dict)
+        and isinstance(root.get("_entries"), dict)
+        and hasattr(source.root.stat_result, "copy")
+        and isinstance(getattr(source, "last_ino", None), int)
+        and isinstance(getattr(source, "mount_points", None), dict)
+    )
+
+
+def replay_fs(source):
+    """
+    Return a new fake filesystem with the same directories, files, and
+    symlinks, created one at a time through the public pyfakefs API
+    """
+    fs = create_fs()
+    source_os = create_os(source)
+    for path, dirnames, filenames in source_os.walk(source.path_separator):
+        if not fs.exists(path):
+            fs.create_dir(path, perm_bits=source_os.stat(path).st_mode & 0o7777)
+        for name in dirnames + filenames:
+            filename = source_os.path.join(path, name)
+            if source_os.path.islink(filename):
+                fs.create_symlink(filename, source_os.readlink(filename))
+            elif name in filenames:
+                original = source.get_object(filename)
+                fs.create_file(filename, st_mode=original.st_mode, contents=original.byte_contents)
+    return fs
+
+
+def clone_fs(source):
+    """
+    Return a new fake filesystem with the same directories and files
+    """
+    if not _can_copy_tree(source):
+        return replay_fs(source)
+    fs = create_fs()
+    # Copying the tree directly is much faster than replaying it
+    # through create_dir and create_file.
+    fs.root = _copy_entry(source.root, fs, None, {})
+    fs.last_ino = source.last_ino
+    fs.mount_points.clear()
+    fs.mount_points.update((path, dict(mount)) for path, mount in source.mount_points.items())
+    return fs
+
+
+def _chunks(content):
+    if content is None:
+        return ()
+    if isinstance(content, (bytes, bytearray, memoryview, str)):
+        return (content,)
+    return content
+
+
+def write_files(os_module, open_function, files):
+    """
+    Create files, making each missing directory only once
+
+    os_module -- (fake) os module
+    open_function -- (fake) open
+    files -- iterable of (filename, content) tuples.
+      See DependencyContext.create_files
+    """
+    made = set()  # directories known to exist
+    # pyfakefs copies the whole file every time it flushes, so let
+    # each file collect in the buffer and flush once when it closes.
+    # (The real open would try to allocate a buffer that size.)
+    buffering = -1 if open_function is open else sys.maxsize
+    for filename, content in files:
+        directory = os_module.path.dirname(filename)
+        if directory and directory not in made:
+            os_module.makedirs(directory, exist_ok=True)
+            while directory and directory not in made:
+                made.add(directory)
+                directory = os_module.path.dirname(directory)
+        with open_function(filename, "wb", buffering=buffering) as f:
+            for chunk in _chunks(content):
+                f.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+
+
+class LazyFilesystem:
+    """
+    A fake filesystem with its fake os module and fake open,
+    all built the first time any of them is needed
+
+    build -- (callable) Returns a pyfakefs FakeFilesystem
+    start -- (callable) Returns a pyfakefs FakeFilesystem in the state
+      reset() goes back to.  Default: empty
+    """
+
+    def __init__(self, build=create_fs, *, start=create_fs):
+        self._build = build
+        self._start = start
+        self._built = None  # fs, os, open
+        # FakeFilesystem copied by fork.  Nothing writes to it until it
+        # gets built, so it can be copied again in the meantime.
+        self._snapshot = None
+        self._lock = Lock()
+        self.stats = None  # FsStats (see count_io)
+        self._counting = None  # os, open that count I/O in stats
+
+    def build(self):
+        """
+        Build now (if not built already).  Return (fs, os, open)
+        """
+        if self._built is None:
+            with self._lock:
+                if self._built is None:
+                    fs = self._build() if self._snapshot is None else self._snapshot
+                    self._snapshot = None
+                    self._built = (fs, create_os(fs), create_open(fs))
+        return self._built
+
+    @property
+    def is_built(self):
+        return self._built is not None
+
+    @property
+    def fs(self):
+        return self.build()[0]
+
+    @property
+    def os(self):
+        if self.stats:
+            return self._build_counting()[0]
+        return self.build()[1]
+
+    @property
+    def open(self):
+        if self.stats:
+            return self._build_counting()[1]
+        return self.build()[2]
+
+    def _build_counting(self):
+        if self._counting is None:
+            _, os_module, open_function = self.build()
+            with self._lock:
+                if self._counting is None:
+                    self._counting = fs_stats.counting(os_module, open_function, self.stats)
+        return self._counting
+
+    def count_io(self, stats):
+        """
+        Count I/O done through os and open from now on
+
+        stats -- (FsStats) Where to count.  None to stop counting.
+        """
+        with self._lock:
+            self.stats = stats
+            self._counting = None
+
+    def fork(self):
+        """
+        Return a LazyFilesystem with a copy of this one as it is now.
+        The directory tree gets copied right away, but file contents are
+        shared (pyfakefs replaces rather than modifies them).
+        If this one has not been built, the fork builds its own in the
+        same way.
+        """
+        with self._lock:
+            source = self._built[0] if self._built else self._snapshot
+            forked = LazyFilesystem(self._build, start=self._start)
+            if source is not None:
+                forked._snapshot = clone_fs(source)
+        return forked
+
+    def reset(self):
+        """
+        Return to the starting state (see start) and stop counting I/O.
+        A filesystem that starts empty gets emptied in place, so its fake
+        os and open stay the same.  Otherwise nothing gets built until
+        the filesystem is next used.
+        """
+        with self._lock:
+            if self._built is not None and self._start is create_fs:
+                self._built[0].reset()
+            else:
+                self._built = None
+            self._snapshot = None
+            self._build = self._start
+            self.stats = None
+            self._counting = None
+
+
+class LazyOs(Passthrough):
+    """
+    Passthrough to the fake os module of a LazyFilesystem.
+    Creating it does not build the filesystem.
+    Attributes set on it (such as a fake environ) stay with it.
+    """
+
+    def __init__(self, filesystem):
+        # Passthrough.__init__ would try to assign _target
+        self._filesystem = filesystem
+
+    @property
+    def _target(self):
+        return self._filesystem.os
+
+    @property
+    def __class__(self):
+        return self._target.__class__
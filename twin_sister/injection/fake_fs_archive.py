@@ -0,0 +1,165 @@
+"""
+Moving trees of files into and out of a fake filesystem.
+
+Readers produce entries, one tuple per directory, file, or symlink:
+  ("directory", path, mode)
+  ("file", path, mode, chunks)
+  ("symlink", path, link_target)
+  ("hardlink", path, existing_path)
+File contents are iterables of byte chunks, so nothing needs to be
+read until it gets written.
+"""
+
+import os
+import stat
+import tarfile
+
+from twin_sister.injection.fake_fs import write_files
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _read_chunks(f):
+    with f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+
+
+def _open_tarball(path_or_fileobj, mode):
+    # Stream modes ("r|*", "w|gz", ...) never seek, so any file object will do
+    if isinstance(path_or_fileobj, (str, os.PathLike)):
+        return tarfile.open(path_or_fileobj, mode=mode)
+    return tarfile.open(fileobj=path_or_fileobj, mode=mode)
+
+
+def _destination(target, name):
+    """
+    Return where an archive member goes.  Refuse to put it outside target.
+    """
+    target = os.path.normpath(target)
+    destination = os.path.normpath(os.path.join(target, name))
+    if os.path.commonpath([target, destination]) != target:
+        raise ValueError(f'Refusing to put "{name}" outside of {target}')
+    return destination
+
+
+def read_directory(path, *, target):
+    """
+    Yield entries for everything under a real directory
+
+    path -- (str) The real directory
+    target -- (str) Where the directory goes in the fake filesystem
+    """
+    for directory, dirnames, filenames in os.walk(path):
+        destination = os.path.normpath(os.path.join(target, os.path.relpath(directory, path)))
+        yield ("directory", destination, stat.S_IMODE(os.stat(directory).st_mode))
+        for name in dirnames + filenames:
+            filename = os.path.join(directory, name)
+            if os.path.islink(filename):
+                yield ("symlink", os.path.join(destination, name), os.readlink(filename))
+            elif name in filenames:
+                mode = stat.S_IMODE(os.stat(filename).st_mode)
+                yield ("file", os.path.join(destination, name), mode, _read_chunks(open(filename, "rb")))
+
+
+def read_tarball(path_or_fileobj, *, target):
+    """
+    Yield entries for the contents of a tar archive (optionally compressed).
+    The archive is read in a single pass.
+    Raise ValueError for a member that would land outside target and for
+    members other than directories, files, and links (such as devices).
+
+    path_or_fileobj -- (str or binary file object) The archive
+    target -- (str) Directory in the fake filesystem where the contents go
+    """
+    with _open_tarball(path_or_fileobj, "r|*") as archive:
+        for member in archive:
+            destination = _destination(target, member.name)
+            if member.isdir():
+                yield ("directory", destination, member.mode)
+            elif member.isfile():
+                yield ("file", destination, member.mode, _read_chunks(archive.extractfile(member)))
+            elif member.issym():
+                yield ("symlink", destination, member.linkname)
+            elif member.islnk():
+                # The name of an earlier member, not a path relative to this one
+                yield ("hardlink", destination, _destination(target, member.linkname))
+            else:
+                raise ValueError(f'Cannot import "{member.name}":  unsupported type of archive member')
+
+
+def load(os_module, open_function, entries):
+    """
+    Create the directories, files, and symlinks described by entries
+    (see read_directory and read_tarball)
+
+    os_module -- fake os module
+    open_function -- fake open
+    """
+    modes = {}  # path -> mode, applied at the end in case one forbids writing
+    symlinks = []
+    hardlinks = []
+
+    def files():
+        for kind, path, *details in entries:
+            if "directory" == kind:
+                os_module.makedirs(path, exist_ok=True)
+                modes[path] = details[0]
+            elif "file" == kind:
+                modes[path] = details[0]
+                yield path, details[1]
+            elif "symlink" == kind:
+                symlinks.append((path, details[0]))
+            else:
+                hardlinks.append((path, details[0]))
+
+    write_files(os_module, open_function, files())
+    for path, link_target in symlinks:
+        os_module.makedirs(os_module.path.dirname(path), exist_ok=True)
+        os_module.symlink(link_target, path)
+    for path, existing_path in hardlinks:
+        os_module.makedirs(os_module.path.dirname(path), exist_ok=True)
+        os_module.link(existing_path, path)
+    for path, mode in sorted(modes.items(), reverse=True):
+        os_module.chmod(path, mode)
+
+
+def export_tarball(os_module, open_function, path_or_fileobj, *, root, compression=""):
+    """
+    Write everything under root in a fake filesystem to a tar archive.
+    Files are copied into the archive a chunk at a time.
+
+    os_module -- fake os module
+    open_function -- fake open
+    path_or_fileobj -- (str or binary file object) Where to write the archive
+    root -- (str) Fake directory to export.  Paths in the archive are
+      relative to it.
+    compression -- "", "gz", "bz2", or "xz"
+    """
+    with _open_tarball(path_or_fileobj, f"w|{compression}") as archive:
+
+        def add(path):
+            status = os_module.lstat(path)
+            info = tarfile.TarInfo(os_module.path.relpath(path, root))
+            info.mode = stat.S_IMODE(status.st_mode)
+            info.mtime = int(status.st_mtime)
+            if stat.S_ISLNK(status.st_mode):
+                info.type = tarfile.SYMTYPE
+                info.linkname = os_module.readlink(path)
+                archive.addfile(info)
+            elif stat.S_ISDIR(status.st_mode):
+                info.type = tarfile.DIRTYPE
+                archive.addfile(info)
+            else:
+                info.size = status.st_size
+                with open_function(path, "rb") as f:
+                    archive.addfile(info, f)
+
+        for directory, dirnames, filenames in os_module.walk(root):
+            if directory != root:
+                add(directory)
+            for name in dirnames:
+                # walk does not descend into symlinks, so add them here
+                if os_module.path.islink(os_module.path.join(directory, name)):
+                    add(os_module.path.join(directory, name))
+            for name in filenames:
+                add(os_module.path.join(directory, name))
@@ -0,0 +1,71 @@
+import os
+from threading import Lock
+
+from twin_sister.injection.fake_fs import LazyFilesystem, clone_fs, create_fs, create_open, create_os
+from twin_sister.injection.fake_fs_archive import load, read_directory, read_tarball
+
+
+class FakeFsImage:
+    """
+    A fake filesystem that gets built once and copied into each context
+    that asks for it:
+
+    image = FakeFsImage.from_directory('tests/fixtures/etc', target='/etc')
+
+    with dependency_context(supply_fs=image) as context:
+        ...
+
+    Nothing is built until a context first uses its copy.  Resetting a
+    context restores its copy of the image.
+
+    build -- (callable) Accepts an empty pyfakefs FakeFilesystem and
+      creates directories and files in it
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._fs = None
+        self._lock = Lock()
+
+    @classmethod
+    def from_directory(cls, path, *, target=None):
+        """
+        Return an image of a real directory and everything under it.
+        Files are read when the image is built.
+
+        path -- (str) The real directory
+        target -- (str) Where the directory goes in the fake filesystem.
+          Default: the same as path
+        """
+        target = target or os.path.abspath(path)
+        return cls(lambda fs: load(create_os(fs), create_open(fs), read_directory(path, target=target)))
+
+    @classmethod
+    def from_tarball(cls, path_or_fileobj, *, target="/"):
+        """
+        Return an image of the contents of a tar archive
+        (optionally compressed with gzip, bzip2, or lzma)
+
+        path_or_fileobj -- (str or binary file object) The archive
+        target -- (str) Directory in the fake filesystem where the archive's
+          contents go
+        """
+        return cls(lambda fs: load(create_os(fs), create_open(fs), read_tarball(path_or_fileobj, target=target)))
+
+    def clone(self):
+        """
+        Return a new pyfakefs FakeFilesystem with a copy of the image
+        """
+        if self._fs is None:
+            with self._lock:
+                if self._fs is None:
+                    fs = create_fs()
+                    self._build(fs)
+                    self._fs = fs
+        return clone_fs(self._fs)
+
+    def lazy_filesystem(self):
+        """
+        Return a LazyFilesystem that starts (and restarts) with a copy
+        """
+        return LazyFilesystem(self.clone, start=self.clone)
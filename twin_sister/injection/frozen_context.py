@@ -0,0 +1,85 @@
+from types import MappingProxyType
+
+from twin_sister.exceptions import FrozenContextError
+from twin_sister.injection.dependency_registry import DependencyRegistry
+from twin_sister.injection.lazy_factory import LazyFactory
+
+
+class FrozenContext:
+    """
+    Immutable, flattened copy of a DependencyContext and its ancestors.
+    Create one with DependencyContext.freeze.
+
+    Nothing about it ever changes, so any number of threads can resolve
+    from it at once without locking.  Each resolution is a single dict
+    lookup.  Attempts to inject raise FrozenContextError.
+    It cannot be the parent of another context.
+
+    os -- the os (or fake os) of the frozen context
+    logging -- the fake logging of the frozen context (if supplied)
+    """
+
+    def __init__(self, *, injected, unhashable_injected, os, logging=None):
+        self.injections = MappingProxyType(dict(injected))
+        self._unhashable_injected = tuple(unhashable_injected)
+        self._attached_threads = []
+        self._inject_cache = {}  # key -> resolutions.  See _lookup_many.
+        self.os = os
+        self.logging = logging
+
+    def attach_to_thread(self, thread_object):
+        """
+        See DependencyContext.attach_to_thread
+        """
+        thread_id = thread_object.ident
+        if not thread_id:
+            raise RuntimeError("A running thread is required.")
+        DependencyRegistry.register(context=self, thread_id=thread_id)
+        self._attached_threads.append(thread_id)
+
+    def close(self):
+        for t in self._attached_threads:
+            DependencyRegistry.unregister(self, thread_id=t)
+        DependencyRegistry.unregister(self)
+        DependencyRegistry.unregister_from_task(self)
+
+    def get(self, dependency):
+        injected = self.lookup(dependency)
+        if type(injected) is LazyFactory:  # see DependencyContext._get
+            return injected.resolve()
+        return injected
+
+    def lookup(self, dependency):
+        """
+        Like get, but return a LazyFactory as is rather than resolving it
+        """
+        try:
+            return self.injections.get(dependency, dependency)
+        except TypeError:
+            for k, v in self._unhashable_injected:
+                if k == dependency:
+                    return v
+            return dependency
+
+    def _lookup_many(self, key, dependencies):
+        """
+        See DependencyContext._lookup_many.
+        Nothing here changes, so the result is cached for good.
+        """
+        try:
+            return self._inject_cache[key]
+        except KeyError:
+            resolutions = {name: self.lookup(dependency) for name, dependency in dependencies.items()}
+            self._inject_cache[key] = resolutions
+            return resolutions
+
+    def _refuse(self, *args, **kwargs):
+        raise FrozenContextError("Cannot inject into a frozen context")
+
+    inject = _refuse
+    inject_as_class = _refuse
+    inject_as_singleton = _refuse
+    inject_factory = _refuse
+    inject_many = _refuse
+    inject_many_as_class = _refuse
+    inject_many_as_singleton = _refuse
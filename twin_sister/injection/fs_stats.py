@@ -0,0 +1,237 @@
+from threading import Lock
+
+from twin_sister.injection.passthrough import Passthrough
+
+# Counted for every path
+PATH_COUNTERS = ("opens", "reads", "writes", "bytes_read", "bytes_written")
+# Counted only in total
+CALL_COUNTERS = ("stat_calls", "listdir_calls")
+# os.path functions that amount to a stat call
+STAT_FUNCTIONS = ("exists", "lexists", "isfile", "isdir", "islink", "getsize", "getmtime", "getatime", "getctime")
+
+
+class FsStats:
+    """
+    Counts the I/O done through a fake filesystem.
+    Create one with DependencyContext.enable_fs_stats.
+
+    Bytes are counted as the caller sees them, so a file opened in text
+    mode counts characters.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._totals = dict.fromkeys(PATH_COUNTERS + CALL_COUNTERS, 0)
+        self._paths = {}  # path -> counters
+
+    def count(self, counter, path=None, amount=1):
+        with self._lock:
+            self._totals[counter] += amount
+            if path is not None:
+                if path not in self._paths:
+                    self._paths[path] = dict.fromkeys(PATH_COUNTERS, 0)
+                self._paths[path][counter] += amount
+
+    def report(self):
+        """
+        Return a dict with these keys:
+          opens, reads, writes, bytes_read, bytes_written -- totals
+          stat_calls -- calls to os.stat, os.lstat, and os.path functions
+            such as exists and isfile
+          listdir_calls -- calls to os.listdir and os.scandir, plus one
+            for each directory that os.walk lists
+          paths -- dict of path -> dict of opens, reads, writes,
+            bytes_read, and bytes_written for that path
+        """
+        with self._lock:
+            report = dict(self._totals)
+            report["paths"] = {path: dict(counters) for path, counters in self._paths.items()}
+        return report
+
+
+def _path_of(file):
+    try:
+        return str(file.__fspath__())
+    except AttributeError:
+        return file
+
+
+class CountingFile(Passthrough):
+    """
+    Wraps a file object returned by open and counts reads and writes
+    """
+
+    def __init__(self, target, *, path, stats):
+        super().__init__(target)
+        self._path = path
+        self._stats = stats
+
+    @property
+    def __class__(self):
+        return self._target.__class__
+
+    def _count_read(self, data):
+        self._stats.count("reads", self._path)
+        self._stats.count("bytes_read", self._path, len(data))
+        return data
+
+    def _count_write(self, amount):
+        self._stats.count("writes", self._path)
+        self._stats.count("bytes_written", self._path, amount)
+
+    def read(self, *args):
+        return self._count_read(self._target.read(*args))
+
+    def read1(self, *args):
+        return self._count_read(self._target.read1(*args))
+
+    def readline(self, *args):
+        return self._count_read(self._target.readline(*args))
+
+    def readlines(self, *args):
+        lines = self._target.readlines(*args)
+        self._stats.count("reads", self._path)
+        self._stats.count("bytes_read", self._path, sum(len(line) for line in lines))
+        return lines
+
+    def readinto(self, buffer):
+        amount = self._target.readinto(buffer)
+        self._stats.count("reads", self._path)
+        self._stats.count("bytes_read", self._path, amount or 0)
+        return amount
+
+    def write(self, data):
+        written = self._target.write(data)
+        self._count_write(len(data))
+        return written
+
+    def writelines(self, lines):
+        lines = list(lines)
+        self._target.writelines(lines)
+        self._count_write(sum(len(line) for line in lines))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self._count_read(next(self._target))
+
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        return self._target.__exit__(*args)
+
+
+class CountingOpen:
+    """
+    Wraps a fake open and counts the files it opens
+    """
+
+    def __init__(self, target, *, stats, descriptors):
+        self._target = target
+        self._stats = stats
+        self._descriptors = descriptors  # see CountingOs
+
+    def __call__(self, file, *args, **kwargs):
+        path = self._descriptors.get(file, file) if isinstance(file, int) else _path_of(file)
+        self._stats.count("opens", path)
+        return CountingFile(self._target(file, *args, **kwargs), path=path, stats=self._stats)
+
+
+class CountingPath(Passthrough):
+    """
+    Wraps a fake os.path and counts the functions that amount to stat calls
+    """
+
+    def __init__(self, target, *, stats):
+        super().__init__(target)
+        self._stats = stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in STAT_FUNCTIONS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self._stats.count("stat_calls")
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+class CountingOs(Passthrough):
+    """
+    Wraps a fake os module and counts opens, reads, writes, stat calls,
+    and directory listings
+    """
+
+    def __init__(self, target, *, stats, descriptors):
+        super().__init__(target)
+        self._stats = stats
+        # file descriptor -> path, so reads and writes can be attributed
+        self._descriptors = descriptors
+        self.path = CountingPath(target.path, stats=stats)
+
+    @property
+    def __class__(self):
+        return self._target.__class__
+
+    def open(self, path, *args, **kwargs):
+        fd = self._target.open(path, *args, **kwargs)
+        path = _path_of(path)
+        self._descriptors[fd] = path
+        self._stats.count("opens", path)
+        return fd
+
+    def close(self, fd):
+        self._descriptors.pop(fd, None)
+        return self._target.close(fd)
+
+    def read(self, fd, n):
+        data = self._target.read(fd, n)
+        path = self._descriptors.get(fd)
+        self._stats.count("reads", path)
+        self._stats.count("bytes_read", path, len(data))
+        return data
+
+    def write(self, fd, data):
+        written = self._target.write(fd, data)
+        path = self._descriptors.get(fd)
+        self._stats.count("writes", path)
+        self._stats.count("bytes_written", path, written)
+        return written
+
+    def stat(self, *args, **kwargs):
+        self._stats.count("stat_calls")
+        return self._target.stat(*args, **kwargs)
+
+    def lstat(self, *args, **kwargs):
+        self._stats.count("stat_calls")
+        return self._target.lstat(*args, **kwargs)
+
+    def listdir(self, *args, **kwargs):
+        self._stats.count("listdir_calls")
+        return self._target.listdir(*args, **kwargs)
+
+    def scandir(self, *args, **kwargs):
+        self._stats.count("listdir_calls")
+        return self._target.scandir(*args, **kwargs)
+
+    def walk(self, *args, **kwargs):
+        # The fake walk lists each directory without calling scandir
+        for listing in self._target.walk(*args, **kwargs):
+            self._stats.count("listdir_calls")
+            yield listing
+
+
+def counting(os_module, open_function, stats):
+    """
+    Return (os, open) that count the I/O they do in stats
+    """
+    descriptors = {}
+    return (
+        CountingOs(os_module, stats=stats, descriptors=descriptors),
+        CountingOpen(open_function, stats=stats, descriptors=descriptors),
+    )
@@ -0,0 +1,28 @@
+import os
+from threading import Lock
+
+
+class Generation:
+    """
+    Counts changes to the injections of every context.
+
+    A resolution cached during one generation must not be trusted in
+    another because the context or one of its ancestors may have changed.
+    """
+
+    current = 0
+    _lock = Lock()
+
+    @classmethod
+    def advance(cls):
+        with cls._lock:
+            cls.current += 1
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        # The lock may have been held by a thread that did not survive the fork
+        cls._lock = Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=Generation._after_fork_in_child)
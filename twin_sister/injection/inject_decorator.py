@@ -0,0 +1,58 @@
+from functools import wraps
+import inspect
+
+from twin_sister.injection.dependency_registry import DependencyRegistry
+from twin_sister.injection.lazy_factory import LazyFactory
+
+INJECTABLE_KINDS = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+
+
+def inject(**dependencies):
+    """
+    Decorator that passes dependencies to a function as keyword arguments.
+    Each argument the caller omits gets what dependency() would return.
+
+    @inject(client=HttpClient, clock=datetime)
+    def fetch(url, *, client, clock):
+        ...
+
+    The signature is examined once, at decoration.  The function resolves
+    all of its dependencies in one pass and reuses the results for as
+    long as the current context and its injections stay the same.
+    The results are cached in the context.
+    """
+
+    def decorate(fn):
+        parameters = inspect.signature(fn).parameters
+        positions = {}  # name -> index of a parameter that can be passed by position
+        for name in dependencies:
+            parameter = parameters.get(name)
+            if parameter is None or parameter.kind not in INJECTABLE_KINDS:
+                raise TypeError(f'{fn.__qualname__} has no parameter "{name}" that can be passed by keyword')
+            if parameter.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD:
+                positions[name] = list(parameters).index(name)
+        # Each context caches this function's resolutions itself, so the
+        # cache goes away with the context rather than keeping it alive.
+        cache_key = object()
+
+        def resolve_all():
+            if not DependencyRegistry.registration_count:
+                return dependencies
+            context = DependencyRegistry.current_context()
+            if context is None:
+                return dependencies
+            return context._lookup_many(cache_key, dependencies)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            for name, value in resolve_all().items():
+                if name in kwargs or positions.get(name, len(args)) < len(args):
+                    continue
+                if type(value) is LazyFactory:  # see DependencyContext._get
+                    value = value.resolve()
+                kwargs[name] = value
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
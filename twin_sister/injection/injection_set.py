@@ -0,0 +1,49 @@
+from collections.abc import Mapping
+
+from twin_sister.injection.fake_singleton import FakeSingleton
+from twin_sister.injection.singleton_class import SingletonClass
+
+
+def injection_pairs(injections):
+    """
+    Return an iterable of (dependency, injected) tuples
+
+    injections -- a mapping of dependency to injected object,
+      an InjectionSet, or an iterable of (dependency, injected) tuples
+    """
+    if isinstance(injections, Mapping):
+        return injections.items()
+    return injections
+
+
+class InjectionSet:
+    """
+    Reusable batch of injections.
+    Build it once and apply it to any number of contexts with
+    DependencyContext.inject_many.
+    """
+
+    def __init__(self, injections=()):
+        self._injections = list(injection_pairs(injections))
+
+    def __iter__(self):
+        return iter(self._injections)
+
+    def __len__(self):
+        return len(self._injections)
+
+    def inject(self, dependency, injected):
+        self._injections.append((dependency, injected))
+        return self
+
+    def inject_as_class(self, dependency, injected):
+        """
+        See DependencyContext.inject_as_class
+        """
+        return self.inject(dependency, SingletonClass(injected))
+
+    def inject_as_singleton(self, dependency, injected):
+        """
+        See DependencyContext.inject_as_singleton
+        """
+        return self.inject(dependency, FakeSingleton(injected))
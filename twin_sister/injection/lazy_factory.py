@@ -0,0 +1,70 @@
+import asyncio
+from threading import Lock, local
+from weakref import WeakKeyDictionary
+
+# Marks an object that the factory has not built yet
+NOT_BUILT = object()
+
+
+class LazyFactory:
+    """
+    Stands in for an injected object until the object is first resolved.
+    Then it calls the factory and supplies the result from then on.
+
+    scope -- how widely a built object is shared:
+      "context" -- one object for the context
+      "thread" -- one object per thread
+      "task" -- one object per asyncio task
+    """
+
+    SCOPES = ("context", "thread", "task")
+
+    def __init__(self, factory, scope="context"):
+        if scope not in self.SCOPES:
+            raise ValueError(f'Unknown scope "{scope}".  Expected one of {self.SCOPES}')
+        self.factory = factory
+        self.scope = scope
+        self._lock = Lock()
+        self._built = NOT_BUILT
+        self._built_per_thread = local()
+        self._built_per_task = WeakKeyDictionary()
+
+    def __reduce__(self):
+        # Locks and thread-locals cannot be pickled, so start over unbuilt
+        return self.__class__, (self.factory, self.scope)
+
+    def _resolve_for_context(self):
+        if self._built is NOT_BUILT:
+            with self._lock:
+                if self._built is NOT_BUILT:
+                    self._built = self.factory()
+        return self._built
+
+    def _resolve_for_thread(self):
+        built = getattr(self._built_per_thread, "built", NOT_BUILT)
+        if built is NOT_BUILT:
+            built = self.factory()
+            self._built_per_thread.built = built
+        return built
+
+    def _resolve_for_task(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            raise RuntimeError("A dependency injected with task scope can be resolved only inside an asyncio task.")
+        with self._lock:
+            built = self._built_per_task.get(task, NOT_BUILT)
+        if built is NOT_BUILT:
+            built = self.factory()
+            with self._lock:
+                built = self._built_per_task.setdefault(task, built)
+        return built
+
+    def resolve(self):
+        if "context" == self.scope:
+            return self._resolve_for_context()
+        if "thread" == self.scope:
+            return self._resolve_for_thread()
+        return self._resolve_for_task()
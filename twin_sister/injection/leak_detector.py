@@ -0,0 +1,137 @@
+import gc
+import os
+import sys
+import traceback
+from types import FunctionType, ModuleType
+from weakref import WeakSet
+
+from twin_sister.injection.dependency_registry import DependencyRegistry
+from twin_sister.injection.resolution_profiler import PACKAGE_DIR
+
+# Objects shared by the whole process rather than retained by a context
+SHARED_TYPES = (type, ModuleType, FunctionType)
+
+
+def capture_creation_stack():
+    """
+    Return the stack that is creating a context (if leak detection is enabled)
+    """
+    if not LeakDetector.enabled:
+        return None
+    stack = traceback.extract_stack()
+    # End with the code that asked for the context, not with this package
+    while stack and os.path.abspath(stack[-1].filename).startswith(PACKAGE_DIR):
+        stack.pop()
+    return traceback.StackSummary.from_list(stack)
+
+
+def approximate_size(root, *, limit=100000):
+    """
+    Estimate the number of bytes retained by an object by summing the sizes
+    of everything reachable from it.  Classes, modules, and functions are
+    shared, so they are neither counted nor followed.
+    """
+    seen = set()
+    pending = [root]
+    total = 0
+    while pending and len(seen) < limit:
+        obj = pending.pop()
+        # type() rather than isinstance, which would ask proxies for __class__
+        if id(obj) in seen or issubclass(type(obj), SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            pass
+        pending += gc.get_referents(obj)
+    return total
+
+
+class ContextLeak:
+    """
+    Describes a context that was left open
+
+    context -- the DependencyContext
+    thread_ids -- IDs of the threads for which it is registered
+    creation_stack -- traceback.StackSummary of the code that created the
+      context (None unless LeakDetector was enabled at the time)
+    """
+
+    def __init__(self, *, context, thread_ids):
+        self.context = context
+        self.thread_ids = thread_ids
+        self.creation_stack = getattr(context, "creation_stack", None)
+
+    def retained_size(self):
+        """
+        Approximate number of bytes kept alive by the context
+        """
+        return approximate_size(self.context)
+
+    def __str__(self):
+        where = "".join(self.creation_stack.format()) if self.creation_stack else "(creation stack not captured)\n"
+        return f"{self.context} registered for threads {self.thread_ids}, created at\n{where}"
+
+
+class LeakDetector:
+    """
+    Finds dependency contexts that were opened but never closed.
+
+    Contexts that are open when the detector is created (or when
+    checkpoint is called) are not considered leaks.  Used as a context
+    manager, it closes anything leaked inside the "with" block.
+
+    Call LeakDetector.enable() before creating contexts to record where
+    each one was created.  Recording stacks is comparatively expensive.
+    """
+
+    enabled = False
+
+    def __init__(self):
+        self.checkpoint()
+
+    @classmethod
+    def enable(cls):
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close_leaks()
+
+    def checkpoint(self):
+        """
+        Consider every context open now to be legitimate
+        """
+        self._legitimate = WeakSet(context for context, _ in DependencyRegistry.registrations())
+
+    def find_leaks(self):
+        """
+        Return a list of ContextLeak objects, one for each context
+        opened since the last checkpoint and still registered for a thread
+        """
+        leaks = {}
+        for context, thread_id in DependencyRegistry.registrations():
+            if context in self._legitimate:
+                continue
+            if id(context) not in leaks:
+                leaks[id(context)] = ContextLeak(context=context, thread_ids=[])
+            leaks[id(context)].thread_ids.append(thread_id)
+        return list(leaks.values())
+
+    def close_leaks(self):
+        """
+        Close every leaked context.  Return the list of ContextLeak objects.
+        """
+        leaks = self.find_leaks()
+        for leak in leaks:
+            leak.context.close()
+            for thread_id in leak.thread_ids:
+                DependencyRegistry.unregister(leak.context, thread_id=thread_id)
+        return leaks
@@ -0,0 +1,77 @@
+import importlib
+from threading import Lock
+
+
+class ServiceName:
+    """
+    The key under which a named service is injected
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, ServiceName) and other.name == self.name
+
+    def __hash__(self):
+        return hash((ServiceName, self.name))
+
+    def __repr__(self):
+        return f"ServiceName({self.name!r})"
+
+
+class NamedServices:
+    """
+    Maps service names to real implementations.
+    Each implementation is imported the first time it is needed,
+    so a process never imports a subsystem it does not use.
+    """
+
+    _import_paths = {}  # name -> import path
+    _keys = {}  # name -> ServiceName
+    _loaded = {}  # name -> real implementation
+    _lock = Lock()
+
+    @classmethod
+    def key(cls, name):
+        """
+        Return the ServiceName for a name (always the same object)
+        """
+        try:
+            return cls._keys[name]
+        except KeyError:
+            with cls._lock:
+                return cls._keys.setdefault(name, ServiceName(name))
+
+    @classmethod
+    def load(cls, name):
+        """
+        Return the real implementation, importing it if necessary
+        """
+        try:
+            return cls._loaded[name]
+        except KeyError:
+            pass
+        try:
+            import_path = cls._import_paths[name]
+        except KeyError:
+            raise KeyError(f'No service named "{name}" has been registered') from None
+        module_name, _, attribute_path = import_path.partition(":")
+        loaded = importlib.import_module(module_name)
+        for attribute in filter(None, attribute_path.split(".")):
+            loaded = getattr(loaded, attribute)
+        with cls._lock:
+            return cls._loaded.setdefault(name, loaded)
+
+    @classmethod
+    def register(cls, name, import_path):
+        """
+        name -- (str) Name by which code will request the service
+        import_path -- (str) Where to find the real implementation:
+          "package.module" for a module or "package.module:attribute"
+          for something inside it (the attribute may be dotted)
+        """
+        with cls._lock:
+            cls._import_paths[name] = import_path
+            cls._loaded.pop(name, None)
+        cls.key(name)
@@ -0,0 +1,114 @@
+from collections import Counter
+import os
+import sys
+from threading import Lock
+from types import ModuleType
+
+# Frames from inside this package are never reported as call sites
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def describe(dependency):
+    """
+    Return a readable name for a dependency
+    """
+    if isinstance(dependency, ModuleType):
+        return dependency.__name__
+    qualname = getattr(dependency, "__qualname__", None)
+    if qualname:
+        return f"{getattr(dependency, '__module__', None)}.{qualname}"
+    return repr(dependency)
+
+
+def find_call_site():
+    frame = sys._getframe(1)
+    while frame and os.path.abspath(frame.f_code.co_filename).startswith(PACKAGE_DIR):
+        frame = frame.f_back
+    if frame is None:
+        return None
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+class ResolutionEvent:
+    """
+    What a profiler passes to its hooks each time a dependency is resolved
+
+    dependency -- the object requested
+    level -- 0 if injected into the context itself, 1 if injected into its
+      parent, and so on.  None if not injected anywhere.
+    elapsed -- (float) seconds spent resolving
+    call_site -- "filename:line" that requested the dependency.
+      None unless the resolution was sampled.
+    """
+
+    def __init__(self, *, dependency, level, elapsed, call_site):
+        self.dependency = dependency
+        self.level = level
+        self.elapsed = elapsed
+        self.call_site = call_site
+
+
+class ResolutionProfiler:
+    """
+    Counts and times the resolutions made by a dependency context.
+    Create one with DependencyContext.enable_profiling.
+
+    sample_every -- Record the call site of every nth resolution.
+      Finding the call site is comparatively expensive.  0 disables sampling.
+    """
+
+    def __init__(self, *, sample_every=100):
+        self.sample_every = sample_every
+        self._hooks = []
+        self._lock = Lock()
+        self.reset()
+
+    def add_hook(self, hook):
+        """
+        Call hook with a ResolutionEvent after each resolution.
+        Useful for forwarding measurements to a metrics system.
+        """
+        self._hooks.append(hook)
+
+    def record(self, dependency, level, elapsed):
+        with self._lock:
+            self.resolutions += 1
+            self.elapsed += elapsed
+            self.by_dependency[describe(dependency)] += 1
+            self.by_level["miss" if level is None else level] += 1
+            sample = self.sample_every and 0 == self.resolutions % self.sample_every
+        call_site = find_call_site() if sample else None
+        if call_site:
+            with self._lock:
+                self.call_sites[call_site] += 1
+        if self._hooks:
+            event = ResolutionEvent(dependency=dependency, level=level, elapsed=elapsed, call_site=call_site)
+            for hook in self._hooks:
+                hook(event)
+
+    def report(self):
+        """
+        Return a dict that summarizes the measurements:
+          resolutions -- total number of resolutions
+          elapsed -- total seconds spent resolving
+          by_dependency -- number of resolutions per dependency
+          by_level -- number of resolutions per context level
+            (see ResolutionEvent) or "miss"
+          call_sites -- number of sampled resolutions per call site
+        """
+        with self._lock:
+            return {
+                "resolutions": self.resolutions,
+                "elapsed": self.elapsed,
+                "by_dependency": dict(self.by_dependency),
+                "by_level": dict(self.by_level),
+                "call_sites": dict(self.call_sites),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.resolutions = 0
+            self.elapsed = 0.0
+            self.by_dependency = Counter()
+            self.by_level = Counter()
+            self.call_sites = Counter()